@@ -1,61 +1,58 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-import os
+
+import data
+import downsample
+import exports
+import instrument
+import queries
+import rollups
+import simplify
 
 # ---------------------------------------------------
 # 📌 CONFIGURATION
 # ---------------------------------------------------
 
-# CHEMINS RELATIFS — OBLIGATOIRE POUR STREAMLIT CLOUD
-DB_CONSO = "bdd2/conso.db"
-DB_DISTANCE = "bdd2/distance.db"
+# Chemins des bases : config.py (relatifs au projet, JIFMAR_DB_CONSO /
+# JIFMAR_DB_DISTANCE pour les remplacer). plotly est importé par les
+# sections qui dessinent, après le premier affichage.
 
 st.set_page_config(page_title="Dashboard JIFMAR", layout="wide")
 st.title("📊 Dashboard Global – Navires JIFMAR")
 
+# Mesures par section (panneau 🐞 avec ?debug=1, journal JSON avec JIFMAR_PERF_LOG)
+perf = instrument.start("Dashboard")
+
 
 # ---------------------------------------------------
-# 🔄 CHARGEMENT DES DONNÉES
+# 🔄 CHARGEMENT DES DONNÉES (couche partagée data.py)
 # ---------------------------------------------------
 
-@st.cache_data
-def load_conso():
-    conn = sqlite3.connect(DB_CONSO)
-    df_ann = pd.read_sql_query("SELECT * FROM conso_annuelle", conn)
-    conn.close()
-
-    df_ann["annee"] = df_ann["annee"].astype(int)
-    return df_ann
-
-
-@st.cache_data
-def load_distance():
-    conn = sqlite3.connect(DB_DISTANCE)
-    df = pd.read_sql_query("SELECT * FROM distance_evolution", conn)
-    conn.close()
-
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df.dropna(subset=["date"], inplace=True)
-    df["year"] = df["date"].dt.year
-    df.sort_values("date", inplace=True)
+# Requêtes paramétrées : le cache (commun à toutes les pages) est indexé
+# par navire + période + version des données, chaque interaction ne lit
+# que les lignes dont elle a besoin
 
-    return df
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def load_filters(conso_version, distance_version):
+    # Les deux bases sont lues en parallèle
+    conso = data.prefetch(data.conso_filters, "conso_annuelle", conso_version)
+    tracks = data.prefetch(data.track_filters, distance_version)
+    navires, conso_years = conso.result()
+    _, track_years = tracks.result()
+    years = conso_years + track_years
+    return min(years), max(years), navires
 
 
-df_ann = load_conso()
-df_dist = load_distance()
+data.prepare_databases()
+data.require_distance_schema()
+conso_version = data.conso_version()
+distance_version = data.distance_version()
+min_year, max_year, navires = load_filters(conso_version, distance_version)
 
 
 # ---------------------------------------------------
 # 🎚️ FILTRE GLOBAL : ANNÉES + NAVIRE
 # ---------------------------------------------------
 
-min_year = int(min(df_ann["annee"].min(), df_dist["year"].min()))
-max_year = int(max(df_ann["annee"].max(), df_dist["year"].max()))
-
 year_start, year_end = st.slider(
     "📅 Sélection de la période (années)",
     min_value=min_year,
@@ -63,44 +60,183 @@ year_start, year_end = st.slider(
     value=(min_year, max_year)
 )
 
-navires = sorted(df_ann["navire"].unique())
 selected_ship = st.selectbox("🚢 Choisir un navire :", navires)
 
+# Chargements lancés ensemble dès que les filtres sont connus : la section
+# conso s'affiche dès que ses données sont prêtes, pendant que les
+# distances (les plus longues à charger) finissent en arrière-plan
+loading = {
+    "conso": data.prefetch(data.conso_annuelle, (selected_ship,), year_start, year_end, conso_version),
+    "distance": data.prefetch(data.distance_series, (selected_ship,), year_start, year_end, distance_version),
+    "distance_cum": data.prefetch(data.distance_cumulative, (selected_ship,), year_start, year_end, distance_version),
+}
+
 
 # ---------------------------------------------------
-# =============== SECTION CONSOMMATION (L/mille) ===============
+# 🧩 SECTIONS (fragments Streamlit)
 # ---------------------------------------------------
 
-st.header("⛽ Consommation des Navires (L/mille)")
-
-df_ann_f = df_ann[
-    (df_ann["annee"] >= year_start) &
-    (df_ann["annee"] <= year_end) &
-    (df_ann["navire"] == selected_ship)
-]
-
-# --------- GRAPHIQUE ANNUEL L/MILLE ---------
+# Chaque section est un fragment : une interaction dans une section
+# (enregistrement d'un export, ouverture de la carte…) ne relance
+# qu'elle. Seuls les filtres globaux (période, navire) relancent la page.
+
+
+@st.fragment
+def section_conso(ship, year_start, year_end, version):
+    st.header("⛽ Consommation des Navires (L/mille)")
+
+    with perf.section("conso") as sec:
+        with sec.step("query"):
+            data.wait(loading["conso"], "⏳ Chargement de la consommation…")
+            df_ann_f = data.conso_annuelle((ship,), year_start, year_end, version)
+        sec.rows(len(df_ann_f))
+
+        # --------- GRAPHIQUE ANNUEL L/MILLE ---------
+
+        st.subheader(f"📈 Consommation annuelle (L/mille) – {ship}")
+
+        with sec.step("figure"):
+            import plotly.express as px
+
+            fig_ann = px.line(
+                df_ann_f,
+                x="annee",
+                y="conso_l_mille",
+                color="navire",
+                markers=True,
+                title=f"Consommation spécifique annuelle (L/mille) – {ship}",
+                labels={"conso_l_mille": "Litre / mille", "annee": "Année"}
+            )
+        sec.figure(fig_ann)
+
+        with sec.step("render"):
+            st.plotly_chart(fig_ann, use_container_width=True)
+
+            # Exports générés au clic seulement (HTML / PNG / CSV / Parquet)
+            exports.figure_downloads(
+                fig_ann, f"conso_annuelle_{ship}", "consommation annuelle",
+                data=df_ann_f, cache_key=(ship, year_start, year_end, version)
+            )
+
+
+@st.fragment
+def section_distance_cumulee(ship, year_start, year_end, version):
+    with perf.section("distance_cumulee") as sec:
+        with sec.step("query"):
+            data.wait(loading["distance_cum"], "⏳ Chargement des distances…")
+            # Cumul lu dans les sommes préfixes calculées à l'ingestion
+            df_cum, _ = data.distance_cumulative((ship,), year_start, year_end, version)
+        sec.rows(len(df_cum))
+
+        st.subheader(f"📈 Distance cumulée – {ship}")
+
+        with sec.step("transform"):
+            df_cum = downsample.downsample(df_cum, "date", "distance_cum")
+
+        with sec.step("figure"):
+            import plotly.express as px
+
+            fig_dist_cum = px.line(
+                df_cum,
+                x="date",
+                y="distance_cum",
+                color="vessel",
+                title=f"Distance cumulée – {ship}",
+                labels={"distance_cum": "Distance cumulée (NM)"}
+            )
+        sec.figure(fig_dist_cum)
+
+        with sec.step("render"):
+            st.plotly_chart(fig_dist_cum, use_container_width=True)
+
+            exports.figure_downloads(
+                fig_dist_cum, f"distance_cumulee_{ship}", "distance cumulée",
+                data=df_cum, cache_key=(ship, year_start, year_end, version)
+            )
+
+
+@st.fragment
+def section_distance_periode(ship, year_start, year_end, version):
+    # Distance journalière (ou mensuelle sur une longue période)
+    with perf.section("distance_periode") as sec:
+        with sec.step("query"):
+            data.wait(loading["distance"], "⏳ Chargement des distances…")
+            df_series, resolution = data.distance_series((ship,), year_start, year_end, version)
+            resolution_label = rollups.RESOLUTION_LABELS[resolution]
+
+        st.subheader(f"📊 Distance {resolution_label} – {ship}")
+
+        with sec.step("transform"):
+            # Barres déjà agrégées par les cumuls (<= MAX_CHART_BUCKETS) : pas de LTTB
+            df_daily = df_series[["date", "distance"]].rename(columns={"distance": "daily_distance"})
+        sec.rows(len(df_daily))
+
+        with sec.step("figure"):
+            import plotly.express as px
+
+            fig_daily = px.bar(
+                df_daily,
+                x="date",
+                y="daily_distance",
+                title=f"Distance {resolution_label} – {ship}",
+            )
+        sec.figure(fig_daily)
+
+        with sec.step("render"):
+            st.plotly_chart(fig_daily, use_container_width=True)
+
+            exports.figure_downloads(
+                fig_daily, f"distance_journaliere_{ship}", f"distance {resolution_label}",
+                data=df_daily, cache_key=(ship, year_start, year_end, version)
+            )
+
+
+@st.fragment
+def section_carte(ship, year_start, year_end, version):
+    # Section la plus coûteuse : rien n'est lu ni dessiné tant que
+    # l'expander est fermé ; l'ouvrir ne relance que ce fragment
+    # (libellé fixe : l'expander reste ouvert quand on change de navire)
+    box = st.expander("🗺️ Carte GPS", key="carte_gps", on_change="rerun")
+    if not box.open:
+        return
+
+    with box, perf.section("carte_gps") as sec:
+        with sec.step("query"):
+            df_map, _ = data.map_track((ship,), year_start, year_end, version)
+        sec.rows(len(df_map))
+
+        if len(df_map) > 1:
+
+            # Trace reliée et simplifiée (Douglas–Peucker) au lieu de tous les points
+            with sec.step("figure"):
+                import plotly.express as px
+
+                fig_map = px.line_mapbox(
+                    df_map,
+                    lat="latitude",
+                    lon="longitude",
+                    color="vessel",
+                    hover_name="date",
+                    title=f"Carte GPS – {ship}",
+                    zoom=simplify.zoom_for_extent(df_map["latitude"], df_map["longitude"]),
+                    height=600
+                )
+
+                fig_map.update_layout(mapbox_style="open-street-map")
+            sec.figure(fig_map)
+
+            with sec.step("render"):
+                st.plotly_chart(fig_map, use_container_width=True)
+
+        else:
+            st.info("Pas assez de données GPS pour afficher la carte.")
 
-st.subheader(f"📈 Consommation annuelle (L/mille) – {selected_ship}")
 
-fig_ann = px.line(
-    df_ann_f,
-    x="annee",
-    y="conso_l_mille",
-    color="navire",
-    markers=True,
-    title=f"Consommation spécifique annuelle (L/mille) – {selected_ship}",
-    labels={"conso_l_mille": "Litre / mille", "annee": "Année"}
-)
-
-st.plotly_chart(fig_ann, use_container_width=True)
+# ---------------------------------------------------
+# =============== SECTION CONSOMMATION (L/mille) ===============
+# ---------------------------------------------------
 
-st.download_button(
-    "📤 Télécharger consommation annuelle (HTML)",
-    data=pio.to_html(fig_ann),
-    file_name=f"conso_annuelle_{selected_ship}.html",
-    mime="text/html"
-)
+section_conso(selected_ship, year_start, year_end, conso_version)
 
 st.markdown("---")
 
@@ -111,83 +247,8 @@ st.markdown("---")
 
 st.header(f"📍 Distances parcourues – {selected_ship}")
 
-df_dist_f = df_dist[
-    (df_dist["year"] >= year_start) &
-    (df_dist["year"] <= year_end) &
-    (df_dist["vessel"] == selected_ship)
-]
-
-
-# --------- DISTANCE CUMULÉE ---------
-
-st.subheader(f"📈 Distance cumulée – {selected_ship}")
-
-df_cum = df_dist_f.copy()
-df_cum["distance_cum"] = df_cum["distance"].cumsum()
-
-fig_dist_cum = px.line(
-    df_cum,
-    x="date",
-    y="distance_cum",
-    color="vessel",
-    title=f"Distance cumulée – {selected_ship}",
-    labels={"distance_cum": "Distance cumulée (NM)"}
-)
-
-st.plotly_chart(fig_dist_cum, use_container_width=True)
-
-st.download_button(
-    "📤 Télécharger distance cumulée (HTML)",
-    data=pio.to_html(fig_dist_cum),
-    file_name=f"distance_cumulee_{selected_ship}.html",
-    mime="text/html"
-)
-
-
-# --------- DISTANCE JOURNALIÈRE ---------
-
-st.subheader(f"📊 Distance journalière – {selected_ship}")
-
-df_daily = df_dist_f.groupby(df_dist_f["date"].dt.date)["distance"].sum().reset_index()
-df_daily.columns = ["date", "daily_distance"]
-
-fig_daily = px.bar(
-    df_daily,
-    x="date",
-    y="daily_distance",
-    title=f"Distance journalière – {selected_ship}",
-)
-
-st.plotly_chart(fig_daily, use_container_width=True)
-
-st.download_button(
-    "📤 Télécharger distance journalière (HTML)",
-    data=pio.to_html(fig_daily),
-    file_name=f"distance_journaliere_{selected_ship}.html",
-    mime="text/html"
-)
-
-
-# --------- CARTE GPS ---------
-
-st.subheader(f"🗺️ Carte GPS – {selected_ship}")
-
-if len(df_dist_f) > 1:
-
-    fig_map = px.scatter_mapbox(
-        df_dist_f,
-        lat="latitude",
-        lon="longitude",
-        color="vessel",
-        title=f"Carte GPS – {selected_ship}",
-        zoom=5,
-        height=600
-    )
-
-    fig_map.update_layout(mapbox_style="open-street-map")
-
-    st.plotly_chart(fig_map, use_container_width=True)
-
-else:
-    st.info("Pas assez de données GPS pour afficher la carte.")
+section_distance_cumulee(selected_ship, year_start, year_end, distance_version)
+section_distance_periode(selected_ship, year_start, year_end, distance_version)
+section_carte(selected_ship, year_start, year_end, distance_version)
 
+perf.finish()
@@ -0,0 +1,363 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import config
+import downsample
+import queries
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+DB_CONSO = config.DB_CONSO
+DB_DISTANCE = config.DB_DISTANCE
+INDEX_HTML = config.ROOT / "index.html"
+
+# Réponses plus petites que ce seuil ne sont pas compressées
+GZIP_MIN_BYTES = 1024
+# Nombre de réponses gardées en mémoire (clé : version de la base + URL)
+RESPONSE_CACHE_SIZE = 256
+
+
+# ---------------------------------------------------
+# 🔌 POOL DE CONNEXIONS EN LECTURE SEULE
+# ---------------------------------------------------
+
+class ConnectionPool:
+    """Connexions SQLite en lecture seule partagées entre les threads du serveur."""
+
+    def __init__(self, db_path, size=4):
+        self.db_path = Path(db_path)
+        self._queue = queue.LifoQueue()
+        for _ in range(size):
+            self._queue.put(sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+            ))
+
+    @contextmanager
+    def connection(self):
+        conn = self._queue.get()
+        try:
+            yield conn
+        finally:
+            self._queue.put(conn)
+
+    def version(self):
+        """Version de la base (cf. queries.data_version) : change à chaque ingestion."""
+        return queries.data_version(self.db_path)
+
+    def last_modified(self):
+        return max((mtime for _, mtime in self.version()), default=0) / 1e9
+
+
+# ---------------------------------------------------
+# 📡 ENDPOINTS
+# ---------------------------------------------------
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default=None, minimum=None):
+    value = params.get(name, [None])[0]
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"Paramètre '{name}' invalide : {value}")
+    if minimum is not None and number < minimum:
+        raise ApiError(400, f"Paramètre '{name}' invalide : {value} (minimum {minimum})")
+    return number
+
+
+def _float_param(params, name, default=None):
+    value = params.get(name, [None])[0]
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(400, f"Paramètre '{name}' invalide : {value}")
+
+
+def _date_param(params, name):
+    value = params.get(name, [None])[0]
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"Paramètre '{name}' invalide : {value}")
+
+
+def get_navires(pools, params):
+    with pools["distance"].connection() as conn:
+        return queries.track_vessels(conn)
+
+
+def get_data(pools, params):
+    """
+    Distance cumulée d'un navire ("Date", "Total distance", "Distance"),
+    sur une année ou tout l'historique.
+    Paramètres : navire, annee, max_points (LTTB), offset / limit (pagination).
+    """
+    navire = params.get("navire", [""])[0]
+    if not navire:
+        raise ApiError(400, "Paramètre 'navire' manquant")
+    annee = _int_param(params, "annee")
+    # LTTB garde au moins le premier et le dernier point (cf. downsample.lttb_indices)
+    max_points = _int_param(params, "max_points", minimum=3)
+    offset = _int_param(params, "offset", 0, minimum=0)
+    limit = _int_param(params, "limit", minimum=1)
+
+    with pools["distance"].connection() as conn:
+        years = queries.track_years(conn, [navire])
+        if not years:
+            raise ApiError(404, f"Navire inconnu : {navire}")
+        if annee is not None and annee not in years:
+            raise ApiError(404, f"Aucune donnée pour {navire} en {annee}")
+
+        first, last = (annee, annee) if annee is not None else (years[0], years[-1])
+        df, resolution = queries.fetch_distance_series(conn, [navire], *queries.year_window(first, last))
+
+    df["total"] = df["distance"].cumsum()
+    if max_points:
+        df = downsample.downsample(df, "date", "total", group=None, max_points=max_points)
+
+    total_count = len(df)
+    df = df.iloc[offset:offset + limit if limit is not None else None]
+
+    rows = [
+        {"Date": d.isoformat(), "Total distance": round(t, 3), "Distance": round(v, 3)}
+        for d, t, v in zip(df["date"], df["total"], df["distance"])
+    ]
+    return rows, {"X-Total-Count": str(total_count), "X-Resolution": resolution}
+
+
+def get_distance(pools, params):
+    """
+    Distance totale (NM) par navire entre debut et fin (dates ISO, bornes
+    optionnelles), ex. depuis le dernier arrêt technique : différence de
+    sommes préfixes, temps constant quel que soit l'historique.
+    Filtre optionnel : navire.
+    """
+    navire = params.get("navire", [""])[0]
+    debut, fin = _date_param(params, "debut"), _date_param(params, "fin")
+
+    with pools["distance"].connection() as conn:
+        vessels = [navire] if navire else queries.track_vessels(conn)
+        df = queries.fetch_distance_total(conn, vessels, debut, fin)
+
+    return [{"Navire": v, "Distance": round(d, 3)} for v, d in zip(df["vessel"], df["distance"])]
+
+
+def get_zone(pools, params):
+    """
+    Positions dans une zone (index spatial R*Tree) : rectangle
+    lat_min / lat_max / lon_min / lon_max, ou cercle lat / lon / rayon (NM).
+    Filtres optionnels : navire, annee.
+    """
+    navire = params.get("navire", [""])[0]
+    annee = _int_param(params, "annee")
+    filters = {
+        "vessels": [navire] if navire else None,
+        "date_start": queries.year_window(annee, annee)[0] if annee is not None else None,
+        "date_end": queries.year_window(annee, annee)[1] if annee is not None else None,
+    }
+
+    rayon = _float_param(params, "rayon")
+    box = [_float_param(params, name) for name in ("lat_min", "lat_max", "lon_min", "lon_max")]
+    with pools["distance"].connection() as conn:
+        if rayon is not None:
+            lat, lon = _float_param(params, "lat"), _float_param(params, "lon")
+            if lat is None or lon is None:
+                raise ApiError(400, "Paramètres 'lat' et 'lon' requis avec 'rayon'")
+            df = queries.fetch_radius(conn, lat, lon, rayon, **filters)
+        elif None not in box:
+            df = queries.fetch_area(conn, *box, **filters)
+        else:
+            raise ApiError(400, "Zone manquante : lat_min, lat_max, lon_min, lon_max ou lat, lon, rayon")
+
+    return [
+        {"Navire": v, "Date": d.isoformat(), "Latitude": la, "Longitude": lo, "Distance": round(dist, 3)}
+        for v, d, la, lo, dist in zip(df["vessel"], df["date"], df["latitude"], df["longitude"], df["distance"])
+    ]
+
+
+def get_conso(pools, params):
+    navire = params.get("navire", [None])[0]
+    with pools["conso"].connection() as conn:
+        df = queries.fetch_conso_annuelle(conn, [navire] if navire else None)
+    return df.to_dict(orient="records")
+
+
+ROUTES = {
+    "/navires": ("distance", get_navires),
+    "/data": ("distance", get_data),
+    "/distance": ("distance", get_distance),
+    "/zone": ("distance", get_zone),
+    "/conso": ("conso", get_conso),
+}
+
+
+# ---------------------------------------------------
+# 🌐 SERVEUR HTTP
+# ---------------------------------------------------
+
+class ResponseCache:
+    """Petit cache LRU des réponses (déjà sérialisées / compressées)."""
+
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+def make_handler(pools, cache):
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "JifmarAPI/1.0"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+
+            if url.path in ("/", "/index.html"):
+                return self._send(200, INDEX_HTML.read_bytes(), "text/html; charset=utf-8")
+
+            if url.path not in ROUTES:
+                return self._send_json(404, {"error": f"Route inconnue : {url.path}"})
+
+            db_name, endpoint = ROUTES[url.path]
+            pool = pools[db_name]
+            version = pool.version()
+            etag = '"' + hashlib.sha1(f"{version}|{self.path}".encode()).hexdigest() + '"'
+            last_modified = pool.last_modified()
+
+            # 304 si le client a déjà cette version
+            if self.headers.get("If-None-Match") == etag:
+                return self._send_not_modified(etag, last_modified)
+            since = self.headers.get("If-Modified-Since")
+            if since and "If-None-Match" not in self.headers:
+                try:
+                    if int(last_modified) <= parsedate_to_datetime(since).timestamp():
+                        return self._send_not_modified(etag, last_modified)
+                except (TypeError, ValueError):
+                    pass
+
+            cached = cache.get((version, self.path))
+            if cached is None:
+                try:
+                    result = endpoint(pools, parse_qs(url.query))
+                except ApiError as e:
+                    return self._send_json(e.status, {"error": str(e)})
+                except sqlite3.Error as e:
+                    return self._send_json(500, {"error": f"Erreur base de données : {e}"})
+                except Exception as e:
+                    # Toujours une réponse, même sur une erreur imprévue
+                    # (pandas.errors.DatabaseError, données inattendues…)
+                    self.log_error("Erreur sur %s : %r", self.path, e)
+                    return self._send_json(500, {"error": f"Erreur interne : {e}"})
+
+                body, extra = result if isinstance(result, tuple) else (result, {})
+                raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                cached = (raw, gzip.compress(raw) if len(raw) >= GZIP_MIN_BYTES else None, extra)
+                cache.put((version, self.path), cached)
+
+            raw, gz, extra = cached
+            headers = dict(extra)
+            headers["ETag"] = etag
+            headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+            headers["Cache-Control"] = "no-cache"
+            headers["Vary"] = "Accept-Encoding"
+            if gz is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+                headers["Content-Encoding"] = "gzip"
+                raw = gz
+            self._send(200, raw, "application/json; charset=utf-8", headers)
+
+        def _send_json(self, status, body):
+            self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"),
+                       "application/json; charset=utf-8")
+
+        def _send_not_modified(self, etag, last_modified):
+            self._send(304, b"", None, {
+                "ETag": etag,
+                "Last-Modified": formatdate(last_modified, usegmt=True),
+            })
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            # index.html peut aussi être ouvert directement depuis le disque
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if os.environ.get("JIFMAR_API_QUIET") is None:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def make_server(distance_db=DB_DISTANCE, conso_db=DB_CONSO, host="127.0.0.1", port=5000, pool_size=4):
+    """Crée le serveur (port=0 : port libre, pratique avec une base de test)."""
+    pools = {
+        "distance": ConnectionPool(distance_db, pool_size),
+        "conso": ConnectionPool(conso_db, pool_size),
+    }
+    return ThreadingHTTPServer((host, port), make_handler(pools, ResponseCache()))
+
+
+# 🚀 Lancement
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API JSON pour index.html")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--distance-db", default=DB_DISTANCE)
+    parser.add_argument("--conso-db", default=DB_CONSO)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    server = make_server(args.distance_db, args.conso_db, args.host, args.port, args.pool_size)
+    print(f"🌐 API prête sur http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
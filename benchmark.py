@@ -0,0 +1,347 @@
+import os
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+ROOT = Path(__file__).resolve().parent
+
+# Historique des mesures (une ligne JSON par exécution), avec les bases
+# plutôt que dans le dépôt (JIFMAR_DATA_DIR ou --output pour le déplacer)
+RESULTS_PATH = config.DATA_DIR / "bench_results.jsonl"
+
+SATCOM_HEADER = ('Date;Timestamp;Latitude;"Latitude DMS";Longitude;"Longitude DMS";'
+                 '"SOG (knots)";"COG (degree)";"Active interface";Signal;"Total distance (nm)"')
+
+MOIS = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin", "Juillet",
+        "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
+
+# Zone de navigation simulée (golfe de Gascogne / Manche)
+LAT_RANGE = (43.0, 50.0)
+LON_RANGE = (-10.0, -1.0)
+
+
+# ---------------------------------------------------
+# 🏭 FLOTTE SYNTHÉTIQUE
+# ---------------------------------------------------
+
+def vessel_names(count):
+    return [f"JIF SYNTH {i:03d}" for i in range(1, count + 1)]
+
+
+def fold(values, low, high):
+    """Replie une trajectoire dans [low, high] (rebond sur les bords)."""
+    span = high - low
+    x = np.mod(values - low, 2 * span)
+    return low + np.where(x > span, 2 * span - x, x)
+
+
+def dms(values, positive, negative, width):
+    """Format satcom : 43° 30' 27" N / 001° 29' 44" W."""
+    a = np.abs(values)
+    deg = np.floor(a).astype(int)
+    minutes = np.floor((a - deg) * 60).astype(int)
+    seconds = np.floor(((a - deg) * 60 - minutes) * 60).astype(int)
+    hemi = np.where(values >= 0, positive, negative)
+    return [f"{d:0{width}d}° {m:02d}' {s:02d}\" {h}"
+            for d, m, s, h in zip(deg, minutes, seconds, hemi)]
+
+
+def simulate_track(rng, start, end, interval_min):
+    """
+    Trajectoire d'un navire : alternance escale (vitesse nulle) / transit
+    (8-12 nœuds, cap qui dérive), un point toutes les interval_min minutes.
+    """
+    step = interval_min * 60
+    timestamps = np.arange(start, end, step, dtype=np.int64) + int(rng.integers(0, 60))
+    n = len(timestamps)
+
+    # Segments de 6 h à 5 jours, un sur deux à quai
+    lengths = rng.integers(6 * 60 // interval_min, 5 * 24 * 60 // interval_min, size=n // 72 + 2)
+    moving = np.arange(len(lengths)) % 2 == 1
+    sog_seg = np.where(moving, rng.uniform(8, 12, len(lengths)), 0.0)
+    cog_seg = rng.uniform(0, 360, len(lengths))
+    sog = np.repeat(sog_seg, lengths)[:n]
+    cog = (np.repeat(cog_seg, lengths)[:n] + np.cumsum(rng.normal(0, 2, n))) % 360
+    sog = np.where(sog > 0, sog + rng.normal(0, 0.3, n), 0.0)
+
+    hours = step / 3600
+    lat0 = rng.uniform(*LAT_RANGE)
+    lon0 = rng.uniform(*LON_RANGE)
+    dlat = sog * hours * np.cos(np.radians(cog)) / 60
+    dlon = sog * hours * np.sin(np.radians(cog)) / (60 * np.cos(np.radians(lat0)))
+    lat = fold(lat0 + np.cumsum(dlat), *LAT_RANGE)
+    lon = fold(lon0 + np.cumsum(dlon), *LON_RANGE)
+    return timestamps, lat, lon, sog, cog, sog * hours
+
+
+def write_satcom_month(path, ts, lat, lon, sog, cog, hop_nm):
+    """Un export mensuel, au format et dans l'ordre (récent -> ancien) du satcom."""
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(ts, unit="s").strftime("%Y-%m-%dT%H:%M:%S"),
+        "Timestamp": ts,
+        "Latitude": np.round(lat, 5),
+        "Latitude DMS": dms(lat, "N", "S", 2),
+        "Longitude": np.round(lon, 5),
+        "Longitude DMS": dms(lon, "E", "W", 3),
+        "SOG (knots)": np.round(sog, 1),
+        "COG (degree)": np.round(cog, 1),
+        "Active interface": np.where(sog > 0, "VSAT", "4G_1056401"),
+        "Signal": "",
+        "Total distance (nm)": np.round(np.cumsum(hop_nm), 2),
+    }).iloc[::-1]
+
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(SATCOM_HEADER + "\n")
+        df.to_csv(f, sep=";", header=False, index=False, lineterminator="\n")
+
+
+def generate_satcom(root, vessels, first_year, years, interval_min, seed=0):
+    """Distance/Distance_<année>/<NAVIRE>/<slug>-satcom-<début>-<fin>.csv"""
+    rng = np.random.default_rng(seed)
+    start = int(datetime(first_year, 1, 1, tzinfo=timezone.utc).timestamp())
+    end = int(datetime(first_year + years, 1, 1, tzinfo=timezone.utc).timestamp())
+    months = pd.date_range(f"{first_year}-01-01", periods=12 * years + 1, freq="MS")
+    bounds = np.array([int(m.timestamp()) for m in months], dtype=np.int64)
+
+    rows = 0
+    for vessel in vessels:
+        ts, lat, lon, sog, cog, hop = simulate_track(rng, start, end, interval_min)
+        cuts = np.searchsorted(ts, bounds)
+        slug = vessel.lower().replace(" ", "")
+        for month_start, i, j in zip(months[:-1], cuts[:-1], cuts[1:]):
+            folder = root / "Distance" / f"Distance_{month_start.year}" / vessel
+            folder.mkdir(parents=True, exist_ok=True)
+            last = month_start + pd.offsets.MonthEnd(0)
+            name = f"{slug}-satcom-{month_start:%Y%m%d}-{last:%Y%m%d}.csv"
+            write_satcom_month(folder / name, ts[i:j], lat[i:j], lon[i:j], sog[i:j], cog[i:j], hop[i:j])
+        rows += len(ts)
+    return rows
+
+
+def generate_workbooks(root, vessels, first_year, years, seed=0):
+    """Consomation_<année>.xlsx, même disposition que les classeurs réels."""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    folder = root / "Consomation"
+    folder.mkdir(parents=True, exist_ok=True)
+
+    for year in range(first_year, first_year + years):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Feuil1"
+        ws.append(["Distances parcourues en Milles Nautiques"])
+        ws.append([year] + vessels)
+        monthly = rng.uniform(0, 1200, size=(12, len(vessels))).round(2)
+        for mois, values in zip(MOIS, monthly):
+            ws.append([mois] + values.tolist())
+        ws.append([])
+        total = monthly.sum(axis=0)
+        ws.append(["TOTAL"] + total.tolist())
+        ws.append([])
+        ws.append(["Consommation annuelle en m3"])
+        m3 = (total * rng.uniform(0.012, 0.016, len(vessels))).round(3)
+        ws.append([None] + m3.tolist())
+        ws.append([])
+        ws.append(["Consommation en litre / mille"])
+        ws.append([])
+        ws.append([None] + (m3 * 1000 / total).tolist())
+        wb.save(folder / f"Consomation_{year}.xlsx")
+
+
+# ---------------------------------------------------
+# ⏱️ MESURES
+# ---------------------------------------------------
+
+class Timings(dict):
+
+    def measure(self, name, func, repeat=1):
+        """Meilleur temps sur repeat exécutions (secondes)."""
+        best, result = None, None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        self[name] = round(best, 4)
+        print(f"⏱️ {name:<32} {best:9.3f} s")
+        return result
+
+
+def bench_ingest(timings, workdir, workers):
+    import export_Distance_sqlite as export
+    import track_store
+
+    export.base_path = workdir / "Distance"
+    export.output_dir = workdir / "bdd2"
+    export.db_path = export.output_dir / "distance.db"
+    export.conso_db_path = export.output_dir / "conso.db"
+    track_store.PARQUET_DIR = workdir / "bdd2" / "tracks"
+
+    timings.measure("ingest.full", lambda: export.export_all_vessels(workers=workers))
+    timings.measure("ingest.noop", lambda: export.export_all_vessels(workers=workers))
+    return export.db_path
+
+
+def bench_conso(timings, workdir, workers):
+    import conso_parser
+    import extract_conso_to_db
+
+    files = sorted(str(p) for p in (workdir / "Consomation").glob("Consomation_*.xlsx"))
+    conso_parser.CACHE_DIR = workdir / "cache"
+    db_path = workdir / "bdd2" / "conso.db"
+    distance_db = workdir / "bdd2" / "distance.db"
+
+    # Premier passage : classeurs lus ; second : résultats relus du cache
+    timings.measure("conso.extract_cold", lambda: extract_conso_to_db.extract_all(files, db_path, workers, distance_db))
+    timings.measure("conso.extract_warm", lambda: extract_conso_to_db.extract_all(files, db_path, workers, distance_db))
+    return db_path
+
+
+def bench_queries(timings, distance_db, conso_db, vessels, first_year, years, repeat):
+    import queries
+
+    queries.prepare_db(distance_db)
+    queries.prepare_db(conso_db)
+    last = first_year + years - 1
+    vessel = vessels[0]
+
+    timings.measure("query.track_years", lambda: queries.track_years(distance_db), repeat)
+    timings.measure("query.series_all_years", lambda: queries.fetch_distance_series(
+        distance_db, [vessel], *queries.year_window(first_year, last)), repeat)
+    timings.measure("query.series_fleet_1y", lambda: queries.fetch_distance_series(
+        distance_db, vessels, *queries.year_window(last, last)), repeat)
+    timings.measure("query.cumulative_all_years", lambda: queries.fetch_distance_cumulative(
+        distance_db, vessels, *queries.year_window(first_year, last)), repeat)
+    timings.measure("query.total_since_date", lambda: queries.fetch_distance_total(
+        distance_db, vessels, f"{last}-06-15"), repeat)
+    timings.measure("query.map_all_years", lambda: queries.fetch_map_track(
+        distance_db, [vessel], *queries.year_window(first_year, last)), repeat)
+    timings.measure("query.tracks_1y", lambda: queries.fetch_tracks(
+        distance_db, [vessel], *queries.year_window(last, last)), repeat)
+    timings.measure("query.segments_all_years", lambda: queries.fetch_segments(
+        distance_db, vessels, *queries.year_window(first_year, last)), repeat)
+    timings.measure("query.radius_20nm", lambda: queries.fetch_radius(
+        distance_db, 45.0, -3.0, 20.0), repeat)
+    timings.measure("query.conso_annuelle", lambda: queries.fetch_conso_annuelle(conso_db), repeat)
+
+
+def bench_figures(timings, distance_db, vessels, first_year, years, repeat):
+    import plotly.express as px
+
+    import downsample
+    import exports
+    import queries
+    import simplify
+
+    window = queries.year_window(first_year, first_year + years - 1)
+    cum, _ = queries.fetch_distance_cumulative(distance_db, vessels, *window)
+    track, _ = queries.fetch_map_track(distance_db, vessels[:1], *window)
+
+    def cumulative():
+        df = downsample.downsample(cum, "date", "distance_cum")
+        return px.line(df, x="date", y="distance_cum", color="vessel")
+
+    fig = timings.measure("figure.cumulative_fleet", cumulative, repeat)
+    timings.measure("figure.map", lambda: px.line_mapbox(
+        track, lat="latitude", lon="longitude", color="vessel",
+        zoom=simplify.zoom_for_extent(track["latitude"], track["longitude"])), repeat)
+    timings.measure("figure.html_export", lambda: exports.figure_html(fig), repeat)
+
+
+# ---------------------------------------------------
+# 📒 HISTORIQUE
+# ---------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record(results_path, entry):
+    """Ajoute la mesure à l'historique et affiche l'écart avec la précédente (même échelle)."""
+    previous = None
+    if results_path.exists():
+        for line in results_path.read_text(encoding="utf-8").splitlines():
+            try:
+                old = json.loads(line)
+            except ValueError:
+                continue
+            if old.get("scale") == entry["scale"]:
+                previous = old
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    if previous is None:
+        return
+    print(f"\n📒 Comparaison avec {previous.get('commit')} ({previous['timestamp']})")
+    for name, value in entry["timings"].items():
+        old = previous["timings"].get(name)
+        if old:
+            delta = (value - old) / old * 100
+            # Écarts de moins de 5 ms : bruit de mesure
+            significant = abs(value - old) > 0.005
+            flag = "🔺" if significant and delta > 10 else "🔻" if significant and delta < -10 else "  "
+            print(f"{flag} {name:<32} {old:9.3f} -> {value:9.3f} s ({delta:+.0f} %)")
+
+
+# 🚀 Lancement
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flotte synthétique + mesures ingestion / requêtes / graphiques")
+    parser.add_argument("--vessels", type=int, default=5)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--first-year", type=int, default=2020)
+    parser.add_argument("--interval", type=int, default=5, help="minutes entre deux positions")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="répétitions des requêtes / graphiques")
+    parser.add_argument("--workdir", type=Path, default=None,
+                        help="dossier de travail (défaut : dossier temporaire)")
+    parser.add_argument("--output", "--results", dest="results", type=Path, default=RESULTS_PATH,
+                        help=f"historique des mesures (défaut : {RESULTS_PATH})")
+    parser.add_argument("--generate-only", action="store_true")
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="jifmar-bench-"))
+    names = vessel_names(args.vessels)
+    timings = Timings()
+
+    print(f"🏭 Génération : {args.vessels} navires × {args.years} ans → {workdir}")
+    rows = timings.measure("generate.satcom", lambda: generate_satcom(
+        workdir, names, args.first_year, args.years, args.interval))
+    timings.measure("generate.workbooks", lambda: generate_workbooks(
+        workdir, names, args.first_year, args.years))
+    print(f"📄 {rows} positions générées")
+
+    if not args.generate_only:
+        distance_db = bench_ingest(timings, workdir, args.workers)
+        conso_db = bench_conso(timings, workdir, args.workers)
+        bench_queries(timings, distance_db, conso_db, names, args.first_year, args.years, args.repeat)
+        bench_figures(timings, distance_db, names, args.first_year, args.years, args.repeat)
+
+        record(args.results, {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "scale": {"vessels": args.vessels, "years": args.years, "interval_min": args.interval},
+            "rows": rows,
+            "cpus": os.cpu_count(),
+            "timings": timings,
+        })
+        print(f"\n💾 Résultats ajoutés à {args.results}")
@@ -0,0 +1,136 @@
+import sqlite3
+from contextlib import contextmanager
+
+from queries import INDEXES
+from sqlite_helpers import has_table
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# Réglages des connexions d'écriture (ETL). WAL : les dashboards continuent
+# de lire l'ancienne version pendant un chargement, sans "database is locked"
+LOAD_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",   # 64 Mo
+]
+
+# Attente maximale si un autre écrivain tient la base (secondes)
+BUSY_TIMEOUT = 30
+
+STAGING_SUFFIX = "__staging"
+
+
+# ---------------------------------------------------
+# 🔌 CONNEXION / TRANSACTION
+# ---------------------------------------------------
+
+def connect_for_load(db_path):
+    """Connexion d'écriture en mode WAL, réglée pour les chargements en masse."""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        # Passage en WAL (persistant dans le fichier) : impossible tant qu'un
+        # lecteur tient encore la base en mode journal classique
+        conn.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Mode WAL non activé pour {db_path} : {e}")
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Transaction explicite (BEGIN IMMEDIATE : le verrou d'écriture est pris
+    tout de suite). Tout est validé ensemble, ou rien en cas d'erreur.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+# ---------------------------------------------------
+# 🔁 TABLE DE TRANSIT + BASCULE ATOMIQUE
+# ---------------------------------------------------
+
+def stage_table(conn, table, create_sql, columns, rows, keep_where=None, keep_params=()):
+    """
+    Remplit la table de transit <table>__staging :
+    - create_sql : CREATE TABLE avec {table} à la place du nom
+    - keep_where : lignes de la table actuelle à conserver (ex. années non relues)
+    - rows       : nouvelles lignes, insérées par executemany
+    """
+    staging = table + STAGING_SUFFIX
+    cols = ", ".join(columns)
+
+    conn.execute(f"DROP TABLE IF EXISTS {staging}")
+    conn.execute(create_sql.format(table=staging))
+
+    if keep_where is not None and has_table(conn, table):
+        conn.execute(
+            f"INSERT INTO {staging} ({cols}) SELECT {cols} FROM {table} WHERE {keep_where}",
+            keep_params,
+        )
+
+    conn.executemany(
+        f"INSERT INTO {staging} ({cols}) VALUES ({', '.join('?' * len(columns))})", rows
+    )
+    return staging
+
+
+def swap_table(conn, table):
+    """Remplace table par sa table de transit, puis recrée ses index."""
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(f"ALTER TABLE {table}{STAGING_SUFFIX} RENAME TO {table}")
+    for sql in INDEXES.get(table, []):
+        conn.execute(sql)
+
+
+def replace_tables(conn, loads):
+    """
+    Recharge plusieurs tables en une seule transaction : chaque table est
+    remplie à part puis basculée. Les lecteurs voient l'ancien jeu de
+    données complet jusqu'au COMMIT, puis le nouveau.
+
+    loads : liste de dict (table, create_sql, columns, rows[, keep_where, keep_params])
+    """
+    with transaction(conn):
+        for load in loads:
+            stage_table(conn, **load)
+        for load in loads:
+            swap_table(conn, load["table"])
+
+
+def swap_in_database(conn, staging_db, tables):
+    """
+    Bascule des tables construites dans une base de transit (reconstruction
+    complète) : schéma, lignes, index et triggers copiés dans la base
+    vivante en une transaction, l'ancienne version restant lisible
+    jusqu'au COMMIT. Les triggers sont recréés après la copie des lignes.
+    """
+    conn.execute("ATTACH DATABASE ? AS staging", (str(staging_db),))
+    try:
+        with transaction(conn):
+            for table in tables:
+                if not has_table(conn, table, "staging"):
+                    continue
+                schema = conn.execute(
+                    "SELECT type, sql FROM staging.sqlite_master "
+                    "WHERE tbl_name = ? AND sql IS NOT NULL "
+                    "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END",
+                    (table,),
+                ).fetchall()
+
+                conn.execute(f"DROP TABLE IF EXISTS main.{table}")
+                conn.execute(schema[0][1])
+                conn.execute(f"INSERT INTO main.{table} SELECT * FROM staging.{table}")
+                for _, sql in schema[1:]:
+                    conn.execute(sql)
+    finally:
+        conn.execute("DETACH DATABASE staging")
@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+
+# ---------------------------------------------------
+# 📌 CHEMINS DU PROJET
+# ---------------------------------------------------
+
+# Tout est relatif au dossier du projet (Streamlit Cloud, poste local…),
+# chaque chemin pouvant être remplacé par une variable d'environnement
+ROOT = Path(__file__).resolve().parent
+
+# Bases SQLite, store Parquet et caches
+DATA_DIR = Path(os.environ.get("JIFMAR_DATA_DIR", ROOT / "bdd2"))
+DB_CONSO = Path(os.environ.get("JIFMAR_DB_CONSO", DATA_DIR / "conso.db"))
+DB_DISTANCE = Path(os.environ.get("JIFMAR_DB_DISTANCE", DATA_DIR / "distance.db"))
+
+# Sources : classeurs Consomation_<année>.xlsx et exports satcom
+# Distance/Distance_*/<NAVIRE>/*.csv
+CONSO_DIR = Path(os.environ.get("JIFMAR_CONSO_DIR", ROOT))
+DISTANCE_DIR = Path(os.environ.get("JIFMAR_DISTANCE_DIR", ROOT / "Distance"))
+
+
+def conso_files():
+    """Classeurs de consommation présents dans CONSO_DIR (chemins texte, triés)."""
+    return sorted(str(p) for p in CONSO_DIR.glob("Consomation_*.xlsx"))
@@ -0,0 +1,205 @@
+import os
+import hashlib
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import config
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# Lignes utiles des classeurs Consomation_<année>.xlsx (index 0, 1ère feuille)
+SHIP_ROW = 1            # noms des navires (colonnes B, C, …)
+ANNUAL_M3_ROW = 18      # consommation annuelle (m³)
+L_MILLE_ROW = 22        # consommation spécifique (L / mille)
+LAST_ROW = L_MILLE_ROW  # rien n'est lu au-delà
+
+MOIS_FR = ["janvier", "février", "mars", "avril", "mai", "juin",
+           "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+
+# Résultats déjà lus, un fichier JSON par empreinte de classeur
+CACHE_DIR = Path(os.environ.get("JIFMAR_CONSO_CACHE", config.DATA_DIR / "cache" / "conso"))
+
+# À incrémenter si la lecture change : les anciens résultats sont ignorés
+PARSER_VERSION = 1
+
+
+# ---------------------------------------------------
+# 📖 LECTURE D'UN CLASSEUR
+# ---------------------------------------------------
+
+def to_float(value):
+    """Cellule -> float (virgule décimale acceptée) ; vide = NaN, texte / erreur = 0."""
+    if value is None:
+        return math.nan
+    try:
+        return float(str(value).replace(",", "."))
+    except ValueError:
+        return 0.0
+
+
+def workbook_year(path):
+    return int(os.path.basename(path).split('_')[1].split('.')[0])
+
+
+def read_rows(path):
+    """Lignes 0..LAST_ROW de la première feuille, en lecture seule (streaming)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        return [list(row) for row in ws.iter_rows(max_row=LAST_ROW + 1, values_only=True)]
+    finally:
+        wb.close()
+
+
+def parse_workbook(path):
+    """
+    Navires, consommations annuelles et mensuelles d'un classeur :
+    {"ships": [...], "annuelle": [[navire, m3, l_mille]], "mensuelle": [[mois, navire, m3]]}
+    """
+    rows = read_rows(path)
+    rows += [[]] * (LAST_ROW + 1 - len(rows))
+
+    ships = [v for v in rows[SHIP_ROW][1:] if v is not None]
+    n = len(ships)
+
+    def cells(i):
+        values = rows[i][1:n + 1]
+        return values + [None] * (n - len(values))
+
+    names = [str(ship).strip() for ship in ships]
+    annuelle = [
+        [ship, to_float(m3), to_float(lm)]
+        for ship, m3, lm in zip(names, cells(ANNUAL_M3_ROW), cells(L_MILLE_ROW))
+    ]
+
+    mensuelle = []
+    for i, row in enumerate(rows):
+        val = row[0] if row else None
+        if isinstance(val, str) and val.strip().lower() in MOIS_FR:
+            mois = val.strip().capitalize()
+            mensuelle += [[mois, ship, to_float(c)] for ship, c in zip(names, cells(i))]
+
+    return {"ships": names, "annuelle": annuelle, "mensuelle": mensuelle}
+
+
+# ---------------------------------------------------
+# 💾 CACHE DISQUE (clé : empreinte du fichier)
+# ---------------------------------------------------
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(digest, cache_dir=None):
+    return Path(cache_dir or CACHE_DIR) / f"{digest}-v{PARSER_VERSION}.json"
+
+
+def load_cached(digest, cache_dir=None):
+    try:
+        with open(cache_path(digest, cache_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached(digest, result, cache_dir=None):
+    path = cache_path(digest, cache_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        # NaN n'est pas du JSON strict, mais json le relit tel quel
+        tmp.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # cache en lecture seule : on relira le classeur la prochaine fois
+
+
+def parse_uncached(task):
+    """Travail d'un processus du pool : lecture + mise en cache d'un classeur."""
+    path, digest, cache_dir = task
+    try:
+        result = parse_workbook(path)
+    except Exception as e:
+        return None, str(e)
+    store_cached(digest, result, cache_dir)
+    return result, None
+
+
+def parse_all(files, workers=None, cache_dir=None):
+    """
+    Lit tous les classeurs : ceux dont l'empreinte est en cache ne sont pas
+    rouverts, les autres sont lus en parallèle (un processus par classeur).
+    Renvoie [(fichier, résultat | None, erreur | None)] dans l'ordre de files.
+    """
+    results = {}
+    missing = []
+    for f in files:
+        try:
+            digest = file_digest(f)
+        except OSError as e:
+            results[f] = (None, str(e))
+            continue
+        cached = load_cached(digest, cache_dir)
+        if cached is not None:
+            results[f] = (cached, None)
+        else:
+            missing.append((f, digest, cache_dir))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            parsed = list(pool.map(parse_uncached, missing))
+    else:
+        parsed = [parse_uncached(task) for task in missing]
+
+    for (f, _, _), outcome in zip(missing, parsed):
+        results[f] = outcome
+
+    return [(f, *results[f]) for f in files]
+
+
+def source_version(files):
+    """Empreinte bon marché des classeurs (nom, taille, date de modification)."""
+    version = []
+    for f in sorted(files):
+        try:
+            stat = os.stat(f)
+        except OSError:
+            continue
+        version.append((os.path.basename(f), stat.st_size, stat.st_mtime_ns))
+    return tuple(version)
+
+
+def load_conso(files, workers=None, cache_dir=None):
+    """
+    DataFrames prêts à l'emploi, colonnes identiques aux tables de conso.db :
+    - annuelle  : annee, navire, conso_m3, conso_l_mille
+    - mensuelle : annee, mois, navire, conso_m3
+    Renvoie (annuelle, mensuelle, erreurs) ; erreurs = [(fichier, message)].
+    """
+    annuelle, mensuelle, errors = [], [], []
+    for f, result, error in parse_all(files, workers, cache_dir):
+        if error is not None:
+            errors.append((f, error))
+            continue
+        year = workbook_year(f)
+        annuelle += [[year, *row] for row in result["annuelle"]]
+        mensuelle += [[year, *row] for row in result["mensuelle"]]
+
+    return (
+        pd.DataFrame(annuelle, columns=["annee", "navire", "conso_m3", "conso_l_mille"]),
+        pd.DataFrame(mensuelle, columns=["annee", "mois", "navire", "conso_m3"]),
+        errors,
+    )
@@ -1,25 +1,15 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import plotly.express as px
-import os
+
+import data
+from conso_parser import MOIS_FR
 
 # --- Config ---
 st.set_page_config(page_title="Suivi Conso Navires", layout="wide")
 
-ROOT = r"C:\Users\SanyLou’eyZEMAL\OneDrive - Jifmar Offshore Services\Documents\Porjet_Monitoring"
-DB = os.path.join(ROOT, "bdd2", "conso.db")
-
-# --- Lecture DB ---
-@st.cache_data
-def load_data():
-    conn = sqlite3.connect(DB)
-    df_ann = pd.read_sql_query("SELECT * FROM conso_annuelle ORDER BY annee, navire", conn)
-    df_mois = pd.read_sql_query("SELECT * FROM conso_mensuelle ORDER BY annee, mois, navire", conn)
-    conn.close()
-    return df_ann, df_mois
-
-df_ann, df_mois = load_data()
+# --- Lecture DB : loaders partagés (data.py), base config.DB_CONSO ;
+# cache indexé par les paramètres et par la version de la base ---
+data.prepare_databases()
+version = data.conso_version()
 
 # --- UI ---
 st.title("⚓ Dashboard consommation des navires")
@@ -32,8 +22,7 @@ mode = st.radio("Vue :", ["Vue annuelle", "Vue mensuelle"], horizontal=True)
 if mode == "Vue annuelle":
     st.subheader("📈 Consommation annuelle")
 
-    navires = sorted(df_ann["navire"].unique())
-    années = sorted(df_ann["annee"].unique())
+    navires, années = data.conso_filters("conso_annuelle", version)
 
     c1, c2, c3 = st.columns([1.5, 1, 1])
 
@@ -41,11 +30,7 @@ if mode == "Vue annuelle":
     min_y, max_y = c2.select_slider("Période :", options=années, value=(années[0], années[-1]))
     metric = c3.radio("Indicateur :", ["m³ (Total)", "L/mille (Spécifique)"])
 
-    df = df_ann[
-        (df_ann["navire"].isin(selected_nav)) &
-        (df_ann["annee"] >= min_y) &
-        (df_ann["annee"] <= max_y)
-    ]
+    df = data.conso_annuelle(tuple(selected_nav), min_y, max_y, version)
 
     if metric.startswith("m³"):
         col = "conso_m3"
@@ -54,6 +39,8 @@ if mode == "Vue annuelle":
         col = "conso_l_mille"
         title = "Consommation spécifique (L/mille)"
 
+    import plotly.express as px
+
     fig = px.line(df, x="annee", y=col, color="navire", markers=True, title=title)
     st.plotly_chart(fig, use_container_width=True)
 
@@ -65,20 +52,27 @@ if mode == "Vue annuelle":
 else:
     st.subheader("📊 Consommation mensuelle")
 
-    navires = sorted(df_mois["navire"].unique())
-    années = sorted(df_mois["annee"].unique())
+    navires, années = data.conso_filters("conso_mensuelle", version)
 
-    c1, c2 = st.columns(2)
+    c1, c2, c3 = st.columns([1.5, 1, 1])
     selected_nav = c1.multiselect("Navires :", navires, default=navires)
     selected_year = c2.selectbox("Année :", années, index=len(années)-1)
+    metric = c3.radio("Indicateur :", ["m³ (Total)", "L/mille (GPS)"], key="metric_mensuelle")
 
-    df = df_mois[
-        (df_mois["navire"].isin(selected_nav)) &
-        (df_mois["annee"] == selected_year)
-    ]
+    import plotly.express as px
 
-    fig = px.line(df, x="mois", y="conso_m3", color="navire", markers=True,
-                  title=f"Consommation mensuelle (m³) — {selected_year}")
+    if metric.startswith("m³"):
+        df = data.conso_mensuelle(tuple(selected_nav), selected_year, version)
+        fig = px.line(df, x="mois", y="conso_m3", color="navire", markers=True,
+                      title=f"Consommation mensuelle (m³) — {selected_year}")
+    else:
+        df = data.efficiency_mensuelle(tuple(selected_nav), selected_year, version)
+        df["mois"] = [MOIS_FR[m - 1].capitalize() for m in df["mois"]]
+        if df.empty:
+            st.info("Pas de consommation spécifique : relancer les exports conso et distances.")
+        fig = px.line(df, x="mois", y="conso_l_mille", color="navire", markers=True,
+                      title=f"Consommation spécifique mensuelle (L/mille) — {selected_year}",
+                      category_orders={"mois": [m.capitalize() for m in MOIS_FR]})
     st.plotly_chart(fig, use_container_width=True)
 
     st.dataframe(df, use_container_width=True)
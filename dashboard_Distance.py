@@ -1,12 +1,18 @@
-import streamlit as st
-import sqlite3
 import pandas as pd
-import plotly.express as px
+import streamlit as st
+
+import data
+import downsample
+import queries
+import rollups
+import segments
+import simplify
 
 # ------------------------------
 # 📌 CONFIG
 # ------------------------------
-DB_PATH = r"C:\Users\SanyLou’eyZEMAL\OneDrive - Jifmar Offshore Services\Documents\Porjet_Monitoring\bdd2\distance.db"
+# Base des positions : config.DB_DISTANCE (relative au projet,
+# JIFMAR_DB_DISTANCE pour la remplacer)
 st.set_page_config(page_title="Monitoring Navires", layout="wide")
 st.title("📊 Dashboard Multi-Navires – JIFMAR")
 
@@ -14,25 +20,18 @@ st.title("📊 Dashboard Multi-Navires – JIFMAR")
 # ------------------------------
 # 🔄 Chargement des données
 # ------------------------------
-@st.cache_data
-def load_data():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM distance_evolution", conn)
-    conn.close()
-
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df.dropna(subset=["date"], inplace=True)
-    df["year"] = df["date"].dt.year
-
-    return df
-
-
-df = load_data()
+# Loaders partagés (data.py) : cache indexé par navires + période +
+# version des données, commun à tous les dashboards du serveur.
+# Positions en représentation compacte (navire catégoriel, float32,
+# epoch entier) : chaque entrée de cache pèse plusieurs fois moins
+data.prepare_databases()
+data.require_distance_schema()
+version = data.distance_version()
+vessels, years = data.track_filters(version)
 
 # ------------------------------
 # 🎛️ FILTRES
 # ------------------------------
-vessels = sorted(df["vessel"].unique())
 
 # Multi sélection navires
 selected_vessels = st.sidebar.multiselect(
@@ -41,8 +40,6 @@ selected_vessels = st.sidebar.multiselect(
     default=vessels  # tous sélectionnés par défaut
 )
 
-years = sorted(df["year"].unique())
-
 # Intervalle d’années
 year_range = st.sidebar.slider(
     "📅 Intervalle d'années",
@@ -53,12 +50,13 @@ year_range = st.sidebar.slider(
 
 start_year, end_year = year_range
 
-# Filtrage global
-filtered = df[
-    (df["vessel"].isin(selected_vessels)) &
-    (df["year"] >= start_year) &
-    (df["year"] <= end_year)
-].sort_values("date")
+# Filtrage global (fait par SQLite) ; positions pleine résolution lues
+# seulement à l'ouverture du tableau brut
+series, resolution = data.distance_series(tuple(selected_vessels), start_year, end_year, version)
+if selected_vessels:
+    df_cum, _ = data.distance_cumulative(tuple(selected_vessels), start_year, end_year, version)
+else:
+    df_cum = pd.DataFrame(columns=["vessel", "date", "distance_cum"])
 
 st.markdown(
     f"### 🔎 Navires : **{', '.join(selected_vessels)}** | "
@@ -72,8 +70,11 @@ st.markdown(
 with st.container():
     st.subheader("📈 Distance cumulée – Comparaison entre navires")
 
-    df_cum = filtered.copy()
-    df_cum["distance_cum"] = df_cum.groupby("vessel")["distance"].cumsum()
+    # Cumul par navire lu dans les sommes préfixes (ingestion) ;
+    # LTTB par navire : la forme de chaque courbe est conservée
+    df_cum = downsample.downsample(df_cum, "date", "distance_cum")
+
+    import plotly.express as px
 
     fig = px.line(
         df_cum,
@@ -88,18 +89,32 @@ with st.container():
     st.plotly_chart(fig, use_container_width=True)
 
 
+# ------------------------------
+# 🧮 Distance depuis une date (ex. dernier arrêt technique)
+# ------------------------------
+with st.container():
+    st.subheader("🧮 Distance parcourue depuis une date")
+
+    since = st.date_input("Depuis le (ex. dernier arrêt technique)", value=None)
+    if since is not None and selected_vessels:
+        # Différence de sommes préfixes : instantané quel que soit l'historique
+        totals = data.distance_total(tuple(selected_vessels), str(since), None, version)
+        columns = st.columns(min(len(totals), 4))
+        for i, (vessel, distance) in enumerate(zip(totals["vessel"], totals["distance"])):
+            columns[i % len(columns)].metric(vessel, f"{distance:,.0f} NM".replace(",", " "))
+
+
 # ------------------------------
 # 📊 Distance journalière multi-navires
 # ------------------------------
 with st.container():
-    st.subheader("📊 Distance journalière – Comparaison")
+    resolution_label = rollups.RESOLUTION_LABELS[resolution]
+    st.subheader(f"📊 Distance {resolution_label} – Comparaison")
 
-    df_daily = (
-        filtered.groupby([filtered["date"].dt.date, "vessel"])["distance"]
-        .sum()
-        .reset_index()
-    )
-    df_daily.columns = ["date", "vessel", "daily_distance"]
+    # Barres déjà agrégées par les cumuls (<= MAX_CHART_BUCKETS) : pas de LTTB
+    df_daily = series[["date", "vessel", "distance"]].rename(columns={"distance": "daily_distance"})
+
+    import plotly.express as px
 
     fig_daily = px.bar(
         df_daily,
@@ -107,34 +122,38 @@ with st.container():
         y="daily_distance",
         color="vessel",
         labels={"daily_distance": "Distance (NM)", "date": "Date"},
-        title="Distance journalière – Multi-navires"
+        title=f"Distance {resolution_label} – Multi-navires"
     )
 
     st.plotly_chart(fig_daily, use_container_width=True)
 
 
 # ------------------------------
-# 🗺️ Carte des points (pas reliés)
+# 🗺️ Carte des traces (simplifiées, reliées)
 # ------------------------------
 with st.container():
-    st.subheader("🗺️ Carte des positions GPS (points non reliés)")
+    st.subheader("🗺️ Carte des traces GPS")
+
+    track, _ = data.map_track(tuple(selected_vessels), start_year, end_year, version)
 
-    if len(filtered) > 1:
+    if len(track) > 1:
 
-        fig_map = px.scatter_mapbox(
-            filtered,
+        import plotly.express as px
+
+        fig_map = px.line_mapbox(
+            track,
             lat="latitude",
             lon="longitude",
             color="vessel",
             hover_name="date",
-            zoom=5,
+            zoom=simplify.zoom_for_extent(track["latitude"], track["longitude"]),
             height=650
         )
 
         fig_map.update_layout(
             mapbox_style="open-street-map",
-            mapbox_center={"lat": filtered["latitude"].mean(),
-                           "lon": filtered["longitude"].mean()},
+            mapbox_center={"lat": track["latitude"].mean(),
+                           "lon": track["longitude"].mean()},
             margin={"r":0,"t":0,"l":0,"b":0},
         )
 
@@ -144,8 +163,37 @@ with st.container():
         st.info("Pas assez de données pour afficher la carte.")
 
 
+# ------------------------------
+# 🧭 Traversées et escales
+# ------------------------------
+with st.expander("🧭 Traversées et escales"):
+    voyages = data.segments(tuple(selected_vessels), start_year, end_year, version)
+
+    if voyages.empty:
+        st.info("Aucun segment : relancer l'export pour segmenter les traces.")
+    else:
+        voyages["state"] = voyages["state"].map(segments.STATE_LABELS)
+        voyages["heures"] = voyages.pop("duration_s") / 3600
+
+        summary = voyages.groupby(["vessel", "state"]).agg(
+            segments=("distance", "size"),
+            distance=("distance", "sum"),
+            heures=("heures", "sum"),
+        )
+        st.dataframe(summary.round(1))
+        st.dataframe(voyages.round({"distance": 1, "heures": 1, "mean_sog": 1, "max_sog": 1}), hide_index=True)
+
+
 # ------------------------------
 # 📄 Tableau brut
 # ------------------------------
-with st.expander("📄 Afficher les données brutes"):
-    st.dataframe(filtered)
+# Positions pleine résolution (lignes triées par navire puis date) chargées
+# seulement quand l'expander est ouvert
+raw_box = st.expander("📄 Afficher les données brutes", key="donnees_brutes", on_change="rerun")
+if raw_box.open:
+    with raw_box:
+        filtered = data.tracks(tuple(selected_vessels), start_year, end_year, version)
+        # Dates reconstruites pour l'affichage uniquement
+        raw = filtered.rename(columns={"epoch": "date"})
+        raw["date"] = queries.epoch_to_datetime(raw["date"])
+        st.dataframe(raw)
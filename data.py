@@ -0,0 +1,167 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import streamlit as st
+
+import config
+import queries
+from conso_parser import load_conso, source_version
+
+# ---------------------------------------------------
+# 🗄️ COUCHE D'ACCÈS AUX DONNÉES PARTAGÉE PAR LES DASHBOARDS
+# ---------------------------------------------------
+
+# Loaders en cache définis une seule fois pour tout le serveur Streamlit :
+# une même requête (navires, période, version) faite par deux pages ou
+# deux sessions est servie par la même entrée de cache.
+# Chaque loader prend la version des données en dernier paramètre
+# (cf. queries.data_version) : une ingestion invalide les entrées.
+#
+# Pas d'import de plotly ici : les dashboards l'importent dans les
+# sections qui dessinent, après le premier affichage de la page.
+
+DB_CONSO = config.DB_CONSO
+DB_DISTANCE = config.DB_DISTANCE
+
+
+@st.cache_resource
+def prepare_databases():
+    # Index de lecture sur les bases existantes (une fois par processus)
+    queries.prepare_db(DB_CONSO)
+    queries.prepare_db(DB_DISTANCE)
+
+
+def require_distance_schema():
+    # Vérifié à chaque exécution (hors cache) : la page repart d'elle-même
+    # une fois la base migrée par l'ETL
+    if queries.legacy_schema(DB_DISTANCE):
+        st.warning(
+            f"🗃️ {DB_DISTANCE} est encore à l'ancien schéma (table distance_evolution). "
+            "Lancer l'export (python export_Distance_sqlite.py) ou "
+            f"python fixes.py {DB_DISTANCE} pour la migrer."
+        )
+        st.stop()
+
+
+def conso_version():
+    return queries.data_version(DB_CONSO)
+
+
+def distance_version():
+    return queries.track_version(DB_DISTANCE)
+
+
+def workbooks_version():
+    return source_version(config.conso_files())
+
+
+# ---------------------------------------------------
+# ⚡ CHARGEMENTS CONCURRENTS
+# ---------------------------------------------------
+
+# À froid, conso et distances se chargent en parallèle (lecture SQLite et
+# parsing pandas relâchent en grande partie le GIL) : le premier graphique
+# attend le plus long des deux chargements, pas leur somme.
+# Les loaders lancés sur le pool n'affichent pas de spinner (pas de
+# contexte Streamlit dans les threads) : la page affiche wait() à la place.
+LOAD_WORKERS = int(os.environ.get("JIFMAR_LOAD_WORKERS", 4))
+
+_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="jifmar-load")
+
+
+def prefetch(loader, *args):
+    """
+    Lance loader(*args) (loader en cache) sur le pool et renvoie le Future.
+    Un appel ensuite depuis la page attend ce calcul au lieu de le refaire
+    (verrou par entrée de st.cache_data) ; cache chaud : résolu aussitôt.
+    """
+    return _pool.submit(loader, *args)
+
+
+def wait(future, message):
+    """Message d'attente à cet emplacement tant que future n'est pas résolu."""
+    if future is None or future.done():
+        return
+    slot = st.empty()
+    slot.info(message)
+    wait_futures([future])
+    slot.empty()
+
+
+# ---------------------------------------------------
+# ⛽ CONSOMMATION (conso.db)
+# ---------------------------------------------------
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES, show_spinner=False)
+def conso_filters(table, version):
+    return queries.conso_navires(DB_CONSO, table), queries.conso_annees(DB_CONSO, table)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES, show_spinner=False)
+def conso_annuelle(navires, annee_min, annee_max, version):
+    return queries.fetch_conso_annuelle(DB_CONSO, navires, annee_min, annee_max)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def conso_mensuelle(navires, annee, version):
+    return queries.fetch_conso_mensuelle(DB_CONSO, annee, navires)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def efficiency_mensuelle(navires, annee, version):
+    # L / mille mensuel pré-calculé à l'ingestion (conso × distance GPS)
+    return queries.fetch_efficiency_mensuelle(DB_CONSO, annee, navires)
+
+
+@st.cache_data(max_entries=4)
+def workbooks(version):
+    """
+    Classeurs Consomation_<année>.xlsx lus directement (parseur partagé,
+    cache disque par empreinte) : (annuelle, mensuelle, erreurs).
+    """
+    return load_conso(config.conso_files())
+
+
+# ---------------------------------------------------
+# 📍 DISTANCES / POSITIONS (distance.db ou store Parquet)
+# ---------------------------------------------------
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES, show_spinner=False)
+def track_filters(version):
+    return queries.track_vessels(DB_DISTANCE), queries.track_years(DB_DISTANCE)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES, show_spinner=False)
+def distance_series(vessels, year_start, year_end, version):
+    # Cumuls pré-calculés à l'ingestion (heure / jour / mois / année)
+    return queries.fetch_distance_series(DB_DISTANCE, vessels, *queries.year_window(year_start, year_end))
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES, show_spinner=False)
+def distance_cumulative(vessels, year_start, year_end, version):
+    # Sommes préfixes journalières : pas de cumsum sur tout l'historique
+    return queries.fetch_distance_cumulative(DB_DISTANCE, vessels, *queries.year_window(year_start, year_end))
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def distance_total(vessels, date_start, date_end, version):
+    # Deux lectures de clé primaire par navire, quelle que soit la période
+    return queries.fetch_distance_total(DB_DISTANCE, vessels, date_start, date_end)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def map_track(vessels, year_start, year_end, version):
+    # Trace simplifiée pré-calculée, bornée par queries.MAP_POINT_BUDGET
+    return queries.fetch_map_track(DB_DISTANCE, vessels, *queries.year_window(year_start, year_end))
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def tracks(vessels, year_start, year_end, version):
+    # Positions pleine résolution, représentation compacte (epoch, float32…)
+    return queries.fetch_tracks(DB_DISTANCE, vessels, *queries.year_window(year_start, year_end), compact=True)
+
+
+@st.cache_data(max_entries=queries.CACHE_MAX_ENTRIES)
+def segments(vessels, year_start, year_end, version):
+    # Traversées / escales découpées à l'ingestion (SOG + COG)
+    return queries.fetch_segments(DB_DISTANCE, vessels, *queries.year_window(year_start, year_end))
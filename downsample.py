@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------
+# 📉 RÉDUCTION DES SÉRIES POUR LES GRAPHIQUES (LTTB)
+# ---------------------------------------------------
+
+# Nombre maximal de points par trace (par navire) envoyés à Plotly ; c'est
+# aussi le nombre maximal de périodes des cumuls (queries.MAX_CHART_BUCKETS)
+MAX_POINTS_PER_TRACE = int(os.environ.get("JIFMAR_MAX_POINTS_PER_TRACE", 1500))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets : indices des n_out points qui
+    conservent au mieux la forme de la courbe (premier et dernier inclus).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bornes des n_out - 2 seaux intermédiaires
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        # Moyenne du seau suivant (ou dernier point)
+        if b + 2 < len(edges):
+            nxt = slice(edges[b + 1], edges[b + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (ys - y[a]) - (x[a] - xs) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        out[b + 1] = a
+    return out
+
+
+def downsample(df, x, y, group="vessel", max_points=None):
+    """
+    Applique LTTB trace par trace (une par valeur de group) avant la
+    construction de la figure ; les autres colonnes suivent les lignes gardées.
+    Réservé aux courbes : sur des barres (distance par période), les barres
+    écartées manqueraient au total.
+    """
+    max_points = max_points or MAX_POINTS_PER_TRACE
+    if len(df) <= max_points:
+        return df
+
+    def _one(part):
+        if len(part) <= max_points:
+            return part
+        xs = part[x]
+        if pd.api.types.is_datetime64_any_dtype(xs):
+            xs = xs.astype("int64")
+        keep = lttb_indices(xs.to_numpy(), part[y].to_numpy(), max_points)
+        return part.iloc[keep]
+
+    if group is None or group not in df.columns:
+        return _one(df)
+
+    parts = [_one(part) for _, part in df.groupby(group, sort=False)]
+    return pd.concat(parts) if parts else df
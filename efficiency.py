@@ -0,0 +1,101 @@
+import sqlite3
+from pathlib import Path
+
+import bulk_load
+from conso_parser import MOIS_FR
+from queries import INDEXES
+from sqlite_helpers import has_table
+
+# ---------------------------------------------------
+# ⛽📍 CONSOMMATION SPÉCIFIQUE MENSUELLE (conso.db × distance.db)
+# ---------------------------------------------------
+
+# Table matérialisée dans conso.db : consommation mensuelle (m³) des
+# classeurs + distance GPS du mois (distance_rollup) -> L / mille.
+# conso_l_mille reste NULL quand le navire n'a pas navigué (pas de #DIV/0! → 0)
+# ou quand aucun CSV ingéré ne couvre le mois : la distance de l'historique
+# migré (une position tous les 2 jours, cf. fixes.migrate_legacy) est bien
+# trop courte pour diviser une consommation
+EFFICIENCY_SQL = """
+CREATE TABLE IF NOT EXISTS efficiency_mensuelle (
+    navire TEXT,
+    annee INTEGER,
+    mois INTEGER,
+    conso_m3 REAL,
+    distance_nm REAL,
+    conso_l_mille REAL,
+    PRIMARY KEY (navire, annee, mois)
+) WITHOUT ROWID
+"""
+
+# Mois des classeurs ("Janvier", "Février"…) -> numéro ; lower() de SQLite
+# ne touche que l'ASCII, les accents des noms sont déjà en minuscules
+MOIS_VALUES = ", ".join(f"('{nom}', {num})" for num, nom in enumerate(MOIS_FR, start=1))
+
+
+def refresh_efficiency(conso_db, distance_db, keys=None, years=None):
+    """
+    Recalcule efficiency_mensuelle dans conso_db, limitée aux couples
+    (navire, année) de keys (partitions GPS ingérées) ou aux années de
+    years (classeurs relus) ; ni l'un ni l'autre : tout.
+    Renvoie le nombre de lignes écrites, ou None si une source manque.
+    """
+    if not Path(conso_db).exists() or not Path(distance_db).exists():
+        return None
+
+    conn = bulk_load.connect_for_load(conso_db)
+    try:
+        conn.execute("ATTACH DATABASE ? AS gps", (str(distance_db),))
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Efficacité mensuelle non calculée ({distance_db}) : {e}")
+        conn.close()
+        return None
+
+    try:
+        if not (has_table(conn, "conso_mensuelle")
+                and has_table(conn, "distance_rollup", "gps")
+                and has_table(conn, "ingested_files", "gps")):
+            return None
+
+        where, params = "1 = 1", []
+        if keys is not None:
+            keys = sorted({(navire, int(annee)) for navire, annee in keys})
+            if not keys:
+                return 0
+            where = f"(navire, annee) IN (VALUES {', '.join('(?, ?)' for _ in keys)})"
+            params = [v for key in keys for v in key]
+        elif years is not None:
+            years = sorted({int(annee) for annee in years})
+            if not years:
+                return 0
+            where = f"annee IN ({', '.join('?' * len(years))})"
+            params = years
+
+        with bulk_load.transaction(conn):
+            conn.execute(EFFICIENCY_SQL)
+            for sql in INDEXES["efficiency_mensuelle"]:
+                conn.execute(sql)
+            conn.execute(f"DELETE FROM efficiency_mensuelle WHERE {where}", params)
+            cursor = conn.execute(f"""
+                INSERT OR REPLACE INTO efficiency_mensuelle
+                    (navire, annee, mois, conso_m3, distance_nm, conso_l_mille)
+                WITH mois_fr (nom, num) AS (VALUES {MOIS_VALUES})
+                SELECT c.navire, c.annee, m.num, c.conso_m3, r.distance,
+                       CASE WHEN r.distance > 0 AND c.conso_m3 IS NOT NULL
+                            THEN c.conso_m3 * 1000.0 / r.distance END
+                FROM conso_mensuelle c
+                JOIN mois_fr m ON m.nom = lower(trim(c.mois))
+                LEFT JOIN gps.distance_rollup r
+                       ON r.vessel = c.navire AND r.resolution = 'month'
+                      AND r.period = printf('%04d-%02d-01 00:00:00', c.annee, m.num)
+                      AND EXISTS (
+                          SELECT 1 FROM gps.ingested_files f
+                          WHERE f.vessel = r.vessel AND f.date_max >= r.period
+                            AND f.date_min < date(r.period, '+1 month')
+                      )
+                WHERE {where}
+            """, params)
+            return cursor.rowcount
+    finally:
+        conn.execute("DETACH DATABASE gps")
+        conn.close()
@@ -1,118 +1,623 @@
 import os
+import io
+import argparse
+import hashlib
 import pandas as pd
-import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-import numpy as np
 
-# 🌍 Calcul distance entre 2 coordonnées (Haversine) en milles nautiques
-def haversine_nm(lat1, lon1, lat2, lon2):
-    R = 3440.065  # Rayon de la Terre en miles nautiques
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+import bulk_load
+import config
+import efficiency
+import fixes
+import rollups
+import segments
+import simplify
+import spatial
+import track_store
+from queries import ensure_indexes
+from track_engine import compute_track_distances, haversine_nm
 
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
-    c = 2 * np.arcsin(np.sqrt(a))
-    return R * c
-
-
-# 📁 Chemin racine des fichiers CSV
-base_path = Path(r"C:\Users\SanyLou’eyZEMAL\OneDrive - Jifmar Offshore Services\Documents\Porjet_Monitoring\Distance")
-year_folders = ["Distance_2023-2022-2021-2020", "Distance_2024", "Distance_2025"]
+# 📁 Chemin racine des fichiers CSV : Distance/Distance_*/<NAVIRE>/*.csv
+# (relatif au projet, comme les dashboards ; cf. config.py)
+base_path = config.DISTANCE_DIR
 
 # 📦 Dossier BDD
-output_dir = base_path.parent / "bdd2"
-output_dir.mkdir(exist_ok=True)
-db_path = output_dir / "distance.db"
+output_dir = config.DATA_DIR
+db_path = config.DB_DISTANCE
+conso_db_path = config.DB_CONSO   # consommation spécifique mensuelle (efficiency.py)
 
-# 🚢 Navires
-vessels = ["JIF GYPTIS", "JIF LACYDON", "JIF SURVEYOR"]
+# Colonnes utiles des exports satcom (le reste n'est pas lu) ; SOG / COG
+# servent à la segmentation traversées / escales. Timestamp est lu en texte
+# puis converti : une cellule vide ou tronquée n'écarte que sa ligne
+SATCOM_COLUMNS = {"Timestamp": "string", "Latitude": "float64", "Longitude": "float64",
+                  "SOG (knots)": "float64", "COG (degree)": "float64"}
 
+# Tables recopiées depuis la base de transit lors d'une reconstruction complète
+REBUILD_TABLES = ["vessels", "fixes", "distance_rtree", "ingested_files", "distance_rollup",
+                  "distance_prefix", "track_simplified", "segments"]
 
-def export_all_vessels():
 
-    print(f"\n📦 Création de {db_path}")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# ---------------------------------------------------
+# 🗂️ MANIFESTE DES FICHIERS DÉJÀ INGÉRÉS
+# ---------------------------------------------------
 
-    # Table avec latitude + longitude pour la carte
+def create_tables(cursor):
+    # 🗃️ Positions (avec latitude + longitude pour la carte) : vessels +
+    # fixes, cf. fixes.py. Une base à l'ancien schéma est migrée d'abord.
+    # Renvoie le nombre de positions migrées (None : pas de migration)
+    migrated = fixes.migrate_legacy(cursor.connection)
+    if migrated is not None:
+        print(f"🗃️ {migrated} positions migrées vers le schéma compact (vessels / fixes)")
+    fixes.create_fixes_tables(cursor)
+
+    # Un enregistrement par CSV source : empreinte + dernier point GPS
+    # (sert à raccorder les distances avec le fichier suivant)
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS distance_evolution (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            path TEXT PRIMARY KEY,
             vessel TEXT,
-            date TEXT,
-            distance REAL,
-            latitude REAL,
-            longitude REAL,
-            UNIQUE(vessel, date, latitude, longitude)
+            size INTEGER,
+            mtime REAL,
+            sha256 TEXT,
+            rows INTEGER,
+            date_min TEXT,
+            date_max TEXT,
+            last_latitude REAL,
+            last_longitude REAL,
+            ingested_at TEXT,
+            bytes_ingested INTEGER
         )
     ''')
-    conn.commit()
 
-    for vessel_name in vessels:
-        print(f"\n🚢 Traitement : {vessel_name}")
-        all_data = []
+    # Bases créées avant le suivi des octets lus (ingestion en continu)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(ingested_files)")}
+    if "bytes_ingested" not in columns:
+        cursor.execute("ALTER TABLE ingested_files ADD COLUMN bytes_ingested INTEGER")
+        cursor.execute("UPDATE ingested_files SET bytes_ingested = size")
+
+    # 🌐 Index spatial des positions (requêtes par zone / rayon)
+    spatial.create_spatial_index(cursor)
+    return migrated
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(cursor):
+    cursor.execute("SELECT * FROM ingested_files")
+    cols = [c[0] for c in cursor.description]
+    return {row[0]: dict(zip(cols, row)) for row in cursor.fetchall()}
+
+
+def discover_sources():
+    """
+    Découverte automatique : chaque sous-dossier de Distance/Distance_* est
+    un navire, chaque CSV qu'il contient un export satcom.
+    """
+    sources = []
+    for year_folder in sorted(base_path.glob("Distance_*")):
+        for folder in sorted(p for p in year_folder.iterdir() if p.is_dir()):
+            for file in sorted(folder.glob("*.csv")):
+                sources.append((folder.name, file))
+    return sources
+
+
+def find_candidate_files(manifest):
+    """
+    Fichiers dont la taille ou la date de modification diffère du manifeste
+    (les autres sont ignorés sans être ouverts).
+    """
+    candidates = []
+
+    for vessel_name, file in discover_sources():
+        key = file.relative_to(base_path).as_posix()
+        stat = file.stat()
+        old = manifest.get(key)
+
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            continue
+
+        candidates.append({
+            "path": key,
+            "file": file,
+            "vessel": vessel_name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "old_sha256": old["sha256"] if old else None,
+            "old_bytes": old.get("bytes_ingested") if old else None,
+        })
+
+    return candidates
+
+
+def read_satcom_csv(file, vessel_name):
+    # Seules Timestamp / Latitude / Longitude / SOG / COG sont lues, avec
+    # types explicites ; la date vient de l'epoch entier (UTC) plutôt que du texte "Date"
+    df = pd.read_csv(
+        file, sep=';', encoding='utf-8-sig',
+        usecols=list(SATCOM_COLUMNS), dtype=SATCOM_COLUMNS
+    )
+    df['Timestamp'] = pd.to_numeric(df['Timestamp'], errors='coerce')
+    df.dropna(subset=['Timestamp', 'Latitude', 'Longitude'], inplace=True)
+    df.rename(columns={'SOG (knots)': 'sog', 'COG (degree)': 'cog'}, inplace=True)
+
+    df['date'] = pd.to_datetime(df.pop('Timestamp').astype('int64'), unit='s')
+    df['vessel'] = vessel_name
+    return df.sort_values('date', kind='stable')
+
+
+def read_appended(candidate, offset, chunk_size=1 << 20):
+    """
+    Lecture des seules lignes ajoutées après offset, si les offset premiers
+    octets n'ont pas changé (empreinte identique au manifeste).
+    Renvoie (empreinte, DataFrame, nouvel offset) ou None si le début du
+    fichier a été réécrit. La dernière ligne incomplète est laissée pour
+    le passage suivant.
+    """
+    h = hashlib.sha256()
+    with open(candidate["file"], "rb") as f:
+        header = f.readline()
+        f.seek(0)
+        remaining = offset
+        while remaining:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                return None
+            h.update(chunk)
+            remaining -= len(chunk)
+        if h.hexdigest() != candidate["old_sha256"]:
+            return None
+        data = f.read()
 
-        for year in year_folders:
-            folder = base_path / year / vessel_name
-            if not folder.exists():
-                print(f"⚠️ Dossier manquant : {folder}")
+    data = data[:data.rfind(b"\n") + 1]
+    h.update(data)
+    return h.hexdigest(), read_satcom_csv(io.BytesIO(header + data), candidate["vessel"]), offset + len(data)
+
+
+def parse_candidate(candidate):
+    """
+    Travail d'un processus du pool : hachage puis lecture du fichier.
+    Un fichier seulement "touché" (même contenu) n'est pas relu ; un fichier
+    qui a seulement grandi n'est lu qu'à partir de l'octet déjà ingéré.
+    Renvoie (empreinte, DataFrame, erreur, offset des lignes ajoutées ou None).
+    """
+    try:
+        old_bytes = candidate.get("old_bytes")
+        if old_bytes and candidate["size"] > old_bytes:
+            tail = read_appended(candidate, old_bytes)
+            if tail is not None:
+                digest, df, offset = tail
+                return digest, df, None, offset
+
+        digest = sha256_file(candidate["file"])
+        if digest == candidate["old_sha256"]:
+            return digest, None, None, None
+        return digest, read_satcom_csv(candidate["file"], candidate["vessel"]), None, None
+    except Exception as e:
+        return None, None, str(e), None
+
+
+def parse_all(candidates, workers):
+    if workers > 1 and len(candidates) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(parse_candidate, candidates)
+    else:
+        for candidate in candidates:
+            yield parse_candidate(candidate)
+
+
+def previous_fix(known, vessel_name, date_min, exclude):
+    """Dernier point connu du navire avant date_min (autre fichier que exclude)."""
+    best = None
+    for entry in known.get(vessel_name, []):
+        if entry["path"] == exclude or entry["date_max"] >= date_min:
+            continue
+        if best is None or entry["date_max"] > best["date_max"]:
+            best = entry
+    return best
+
+
+def restitch_next_files(cursor, manifest, known, frames):
+    """
+    🔗 Fichiers déjà ingérés (hors lot) dont le point de raccordement change
+    avec ce lot (fichier précédent modifié, prolongé ou nouveau) : leur
+    premier saut est recalculé dans fixes et segments.
+    Renvoie les corrections (vessel, date, delta) à reporter dans les cumuls.
+    """
+    segments.create_segments_table(cursor)
+    batch = {item["path"] for item in frames}
+    before = {}
+    for entry in manifest.values():
+        before.setdefault(entry["vessel"], []).append(entry)
+
+    hops = []
+    for vessel in sorted({item["vessel"] for item in frames}):
+        for entry in before.get(vessel, []):
+            if entry["path"] in batch:
+                continue
+            old = previous_fix(before, vessel, entry["date_min"], entry["path"])
+            new = previous_fix(known, vessel, entry["date_min"], entry["path"])
+            if _last_point(old) == _last_point(new):
                 continue
 
-            for file in folder.glob("*.csv"):
-                try:
-                    df = pd.read_csv(file, sep=';')
-                    df.columns = [c.strip() for c in df.columns]
+            file = base_path / entry["path"]
+            if not file.exists():
+                continue
+            df = read_satcom_csv(file, vessel)
+            if df.empty:
+                continue
+            first = df.iloc[0]
+            delta = _hop(new, first) - _hop(old, first)
+
+            cursor.execute('''
+                UPDATE fixes SET distance = ?
+                WHERE vessel_id = ? AND epoch = ?
+            ''', (_hop(new, first), fixes.vessel_id(cursor, vessel), fixes.to_epoch(first['date'])))
+            cursor.execute('''
+                UPDATE segments SET distance = distance + ?
+                WHERE vessel = ? AND date_start = (
+                    SELECT MIN(date_start) FROM segments WHERE vessel = ? AND source = ?
+                )
+            ''', (delta, vessel, vessel, entry["path"]))
+            hops.append((vessel, str(first['date']), delta))
+    return hops
+
+
+def _last_point(entry):
+    if entry is None:
+        return None
+    return entry["date_max"], entry["last_latitude"], entry["last_longitude"]
+
+
+def _hop(entry, first):
+    # Sans point précédent, le premier point d'une trace vaut 0 (cf. hop_distances)
+    if entry is None:
+        return 0.0
+    return float(haversine_nm(entry["last_latitude"], entry["last_longitude"],
+                              first['Latitude'], first['Longitude']))
+
+
+def export_all_vessels(workers=None, rebuild=False):
+    output_dir.mkdir(exist_ok=True)
+
+    if not rebuild:
+        partitions = load_into(db_path, workers)
+        if partitions:
+            export_efficiency(partitions)
+        if partitions is not None:
+            export_parquet(partitions)
+        return
+
+    # 🔁 Reconstruction complète dans une base de transit, puis bascule
+    # des tables en une transaction : les dashboards ne voient jamais
+    # une base à moitié reconstruite
+    staging = db_path.with_name(db_path.stem + ".staging.db")
+    remove_database(staging)
+    try:
+        if load_into(staging, workers) is None:
+            return
+        conn = bulk_load.connect_for_load(db_path)
+        bulk_load.swap_in_database(conn, staging, REBUILD_TABLES)
+        # Base vivante encore à l'ancien schéma : ses positions viennent
+        # d'être remplacées, l'ancienne table est seulement supprimée
+        fixes.migrate_legacy(conn, copy=False)
+        fixes.create_fixes_tables(conn.cursor())
+        conn.commit()
+        conn.close()
+        print(f"🔁 Tables basculées dans {db_path}")
+    finally:
+        remove_database(staging)
 
-                    df = df[['Date', 'Latitude', 'Longitude']].copy()
-                    df.rename(columns={'Date': 'date'}, inplace=True)
+    export_parquet()
+    export_efficiency()
 
-                    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                    df.dropna(subset=['date', 'Latitude', 'Longitude'], inplace=True)
 
-                    df['vessel'] = vessel_name
-                    all_data.append(df)
+def remove_database(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(str(path) + suffix).unlink(missing_ok=True)
 
-                except Exception as e:
-                    print(f"❌ Erreur dans {file.name} : {e}")
 
-        if not all_data:
-            print(f"⛔ Aucune donnée trouvée pour {vessel_name}")
+def load_into(target, workers=None):
+    """
+    Ingestion incrémentale dans target (WAL, un lot = une transaction).
+    Renvoie les partitions (navire, année) modifiées, ou None si rien à faire
+    (ensemble vide si seule une migration de schéma a eu lieu).
+    """
+    print(f"\n📦 Mise à jour de {target}")
+    conn = bulk_load.connect_for_load(target)
+    cursor = conn.cursor()
+
+    migrated = create_tables(cursor)
+    ensure_indexes(conn)
+    nothing = set() if migrated else None
+
+    manifest = load_manifest(cursor)
+    candidates = find_candidate_files(manifest)
+
+    if not candidates:
+        conn.close()
+        print("\n✅ Aucun fichier nouveau ou modifié — base à jour.")
+        return nothing
+
+    frames = read_candidates(cursor, candidates, workers)
+
+    if not frames:
+        conn.commit()
+        conn.close()
+        print("\n✅ Aucun contenu nouveau — base à jour.")
+        return nothing
+
+    partitions = ingest_frames(conn, manifest, frames)
+    conn.close()
+    print("\n🎉 Export terminé →", target)
+    return partitions
+
+
+def read_candidates(cursor, candidates, workers=None):
+    """
+    📖 Lecture parallèle (hachage + CSV) ; ce processus reste l'unique
+    écrivain SQLite et consomme les résultats au fil de l'eau.
+    Renvoie les fichiers à ingérer (avec "frame", dates et dernier point).
+    """
+    workers = workers or os.cpu_count() or 1
+
+    frames = []
+    for item, (digest, df, error, offset) in zip(candidates, parse_all(candidates, workers)):
+        item["sha256"] = digest
+
+        if error is not None:
+            print(f"❌ Erreur dans {item['file'].name} : {error}")
             continue
 
-        df = pd.concat(all_data).sort_values(by='date')
-        df.reset_index(drop=True, inplace=True)
+        if offset is not None:
+            # Seules les lignes ajoutées en fin de fichier ont été lues
+            item["mode"] = "append"
+            item["bytes_ingested"] = offset
 
-        # 🔥 Calcul des distances réelles GPS -> GPS
-        df['distance'] = 0.0
-        for i in range(1, len(df)):
-            df.at[i, 'distance'] = haversine_nm(
-                df.at[i-1, 'Latitude'], df.at[i-1, 'Longitude'],
-                df.at[i, 'Latitude'], df.at[i, 'Longitude']
+        if df is None:
+            # Fichier simplement "touché" : on met à jour l'empreinte
+            cursor.execute(
+                "UPDATE ingested_files SET size = ?, mtime = ? WHERE path = ?",
+                (item["size"], item["mtime"], item["path"])
             )
+            continue
+
+        print(f"📄 {item['path']}")
+        if df.empty:
+            print(f"⛔ Aucune donnée dans {item['file'].name}")
+            continue
+
+        item["frame"] = df
+        item["date_min"] = str(df['date'].iloc[0])
+        item["date_max"] = str(df['date'].iloc[-1])
+        item["last_latitude"] = float(df['Latitude'].iloc[-1])
+        item["last_longitude"] = float(df['Longitude'].iloc[-1])
+        frames.append(item)
+
+    return frames
+
+
+def ingest_frames(conn, manifest, frames):
+    """
+    Écrit un lot de fichiers lus (items avec "frame") dans UNE transaction :
+    points échantillonnés, manifeste, cumuls et traces simplifiées.
+
+    Chaque item a un mode :
+    - "replace" (défaut) : le fichier remplace sa version précédente
+    - "append"           : les lignes s'ajoutent à celles déjà ingérées
+                           (octets ajoutés en fin de fichier, cf. watch_ingest.py)
+
+    Renvoie les partitions (navire, année) touchées.
+    """
+    cursor = conn.cursor()
+
+    # Derniers points connus par navire : manifeste + fichiers de ce lot
+    known = {}
+    for entry in manifest.values():
+        known.setdefault(entry["vessel"], []).append(entry)
+    for item in frames:
+        known.setdefault(item["vessel"], [])
+        if item.get("mode", "replace") == "replace":
+            known[item["vessel"]] = [e for e in known[item["vessel"]] if e["path"] != item["path"]]
+    for item in frames:
+        known[item["vessel"]].append(item)
+
+    # Fichiers suivants déjà en base : premier saut mesuré depuis l'ancien
+    # dernier point (à lire avant la mise à jour du manifeste ci-dessous)
+    hops = restitch_next_files(cursor, manifest, known, frames)
+
+    # 🔗 Raccordement : chaque fichier commence par le dernier point du
+    # fichier précédent du même navire, pour que la première distance soit juste
+    # (en mode "append", le fichier lui-même peut fournir ce point)
+    parts = []
+    for item in frames:
+        df = item["frame"].copy()
+        df['source'] = item["path"]
+        df['anchor'] = False
+
+        exclude = item["path"] if item.get("mode", "replace") == "replace" else None
+        prev = previous_fix(known, item["vessel"], item["date_min"], exclude)
+        if prev is not None:
+            anchor = pd.DataFrame({
+                'date': [pd.Timestamp(prev["date_max"])],
+                'Latitude': [prev["last_latitude"]],
+                'Longitude': [prev["last_longitude"]],
+                'vessel': [item["vessel"]],
+                'source': [item["path"]],
+                'anchor': [True],
+            })
+            df = pd.concat([anchor, df], ignore_index=True)
+        parts.append(df)
+
+    # 🔥 Calcul des distances réelles GPS -> GPS : un seul appel vectorisé
+    # pour tout le lot (chaque fichier est un segment indépendant)
+    df_all = compute_track_distances(
+        pd.concat(parts, ignore_index=True),
+        vessel_col='source', lat_col='Latitude', lon_col='Longitude'
+    )
+    df_all = df_all[~df_all['anchor']]
+
+    # Partitions (navire, année) du store Parquet à réécrire
+    partitions = {(vessel, int(date[:4])) for vessel, date, _ in hops}
+    # Plages remplacées (fichiers modifiés), à retirer aussi des cumuls
+    replaced = []
+
+    for item in frames:
+        old = manifest.get(item["path"])
+        append = item.get("mode", "replace") == "append"
+        partitions.update(partition_years(item))
+
+        # Fichier modifié : on remplace les lignes de sa plage de dates
+        if old is not None and not append:
+            cursor.execute('''
+                DELETE FROM fixes
+                WHERE vessel_id = ? AND epoch BETWEEN ? AND ?
+            ''', (fixes.vessel_id(cursor, old["vessel"]),
+                  fixes.to_epoch(old["date_min"]), fixes.to_epoch(old["date_max"])))
+            partitions.update(partition_years(old))
+            replaced.append((old["vessel"], old["date_min"], old["date_max"]))
+        elif old is None and not append:
+            # Fichier absent du manifeste : sa plage peut déjà être en base
+            # (historique migré de l'ancien schéma, cf. fixes.migrate_legacy),
+            # avec d'autres jours échantillonnés et des cumuls calculés
+            # dessus. Ces positions sont remplacées par celles du fichier.
+            deleted = cursor.execute('''
+                DELETE FROM fixes
+                WHERE vessel_id = ? AND epoch BETWEEN ? AND ?
+            ''', (fixes.vessel_id(cursor, item["vessel"]),
+                  fixes.to_epoch(item["date_min"]), fixes.to_epoch(item["date_max"]))).rowcount
+            if deleted > 0:
+                replaced.append((item["vessel"], item["date_min"], item["date_max"]))
+
+        df = df_all[df_all['source'] == item["path"]].copy()
 
         # 🔍 Échantillonnage : 1 point tous les 2 jours
+        # (premier point des jours pairs, indépendant du découpage en fichiers)
         df['date_only'] = df['date'].dt.date
         sampled_df = df.groupby('date_only').first().reset_index()
-        sampled_df = sampled_df.iloc[::2]
+        sampled_df = sampled_df[
+            sampled_df['date_only'].map(lambda d: d.toordinal() % 2 == 0)
+        ]
+
+        # Epoch entier (= Timestamp satcom) et coordonnées en virgule fixe
+        vessel_id = fixes.vessel_id(cursor, item["vessel"], create=True)
+        epoch = sampled_df['date'].dt.as_unit('s').astype('int64')
 
-        # Conversion vers string pour SQLite
-        sampled_df['date'] = sampled_df['date'].astype(str)
+        if append and not sampled_df.empty:
+            # Jours déjà représentés par un lot précédent du même fichier
+            day_start = int(epoch.min()) // 86400 * 86400
+            cursor.execute('''
+                SELECT DISTINCT epoch / 86400 FROM fixes
+                WHERE vessel_id = ? AND epoch BETWEEN ? AND ?
+            ''', (vessel_id, day_start, int(epoch.max()) // 86400 * 86400 + 86399))
+            seen = {r[0] for r in cursor.fetchall()}
+            keep = ~(epoch // 86400).isin(seen)
+            sampled_df, epoch = sampled_df[keep], epoch[keep]
 
         # 📌 Ajout Latitude + Longitude dans l'insertion SQLite
         cursor.executemany('''
-            INSERT OR IGNORE INTO distance_evolution (vessel, date, distance, latitude, longitude)
+            INSERT OR IGNORE INTO fixes (vessel_id, epoch, distance, lat_e7, lon_e7)
             VALUES (?, ?, ?, ?, ?)
-        ''', sampled_df[['vessel', 'date', 'distance', 'Latitude', 'Longitude']].values.tolist())
+        ''', zip([vessel_id] * len(epoch), epoch.tolist(), sampled_df['distance'].tolist(),
+                 fixes.encode_coord(sampled_df['Latitude']).tolist(),
+                 fixes.encode_coord(sampled_df['Longitude']).tolist()))
 
-        conn.commit()
-        print(f"✅ {len(sampled_df)} points insérés pour {vessel_name}")
+        entry = {k: v for k, v in item.items() if k != "frame"}
+        entry["rows"] = len(df)
+        if append and old is not None:
+            # Fusion avec ce qui était déjà connu du fichier
+            entry["rows"] += old["rows"] or 0
+            entry["date_min"] = min(old["date_min"], item["date_min"])
+            if old["date_max"] > item["date_max"]:
+                entry["date_max"] = old["date_max"]
+                entry["last_latitude"] = old["last_latitude"]
+                entry["last_longitude"] = old["last_longitude"]
 
-    conn.close()
-    print("\n🎉 Export terminé →", db_path)
+        cursor.execute('''
+            REPLACE INTO ingested_files
+                (path, vessel, size, mtime, sha256, rows, date_min, date_max,
+                 last_latitude, last_longitude, ingested_at, bytes_ingested)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (entry["path"], entry["vessel"], entry["size"], entry["mtime"], entry["sha256"],
+              entry["rows"], entry["date_min"], entry["date_max"],
+              entry["last_latitude"], entry["last_longitude"],
+              datetime.now().isoformat(timespec="seconds"),
+              entry.get("bytes_ingested", entry["size"])))
+        manifest[entry["path"]] = entry
+
+        print(f"✅ {len(sampled_df)} points insérés pour {item['vessel']} ({item['file'].name})")
+
+    # 📊 Cumuls heure / jour / mois / année calculés sur TOUS les sauts GPS
+    # (avant échantillonnage), pour des graphiques justes et légers
+    years = rollups.update_rollups(conn, df_all, replaced, lat_col='Latitude', lon_col='Longitude',
+                                   hops=hops)
+    print(f"📊 Cumuls mis à jour pour {years} navire(s)-année(s)")
+
+    # 🗺️ Traces simplifiées multi-niveaux pour les cartes (pleine résolution
+    # en entrée, un segment par fichier source)
+    points = simplify.update_simplified(conn, df_all, replaced, lat_col='Latitude', lon_col='Longitude')
+    print(f"🗺️ {points} points de traces simplifiées écrits")
+
+    # 🧭 Segments en route / à l'arrêt (SOG + COG, pleine résolution)
+    count = segments.update_segments(conn, df_all, replaced, lat_col='Latitude', lon_col='Longitude')
+    print(f"🧭 {count} segment(s) traversée / escale écrit(s)")
+
+    # Un seul commit : les lecteurs voient tout le lot ou rien
+    conn.commit()
+    return partitions
+
+
+def partition_years(entry):
+    first, last = int(entry["date_min"][:4]), int(entry["date_max"][:4])
+    return {(entry["vessel"], year) for year in range(first, last + 1)}
+
+
+def export_parquet(partitions=None):
+    """
+    Aligne le store Parquet (backend optionnel des dashboards) sur distance.db :
+    partitions touchées, plus celles qui manquent au store (historique migré,
+    store créé après la base) ; store absent ou vide : reconstruction complète.
+    """
+    try:
+        if partitions is None or not track_store.list_partitions():
+            count = track_store.rebuild_store(db_path)
+        else:
+            partitions = set(partitions) | (track_store.db_partitions(db_path)
+                                            - set(track_store.list_partitions()))
+            track_store.refresh_partitions(db_path, partitions)
+            count = len(partitions)
+    except ImportError:
+        print("⚠️ pyarrow non installé : store Parquet non mis à jour")
+        return
+    print(f"🧱 {count} partition(s) Parquet écrite(s) → {track_store.PARQUET_DIR}")
+
+
+def export_efficiency(partitions=None):
+    """Recalcule L / mille mensuel (conso.db) pour les navires-années ingérés."""
+    count = efficiency.refresh_efficiency(conso_db_path, db_path, partitions)
+    if count is not None:
+        print(f"⛽ {count} mois de consommation spécifique recalculés")
 
 
 # 🚀 Lancement
 if __name__ == "__main__":
-    export_all_vessels()
+    parser = argparse.ArgumentParser(description="Export des positions satcom vers distance.db")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="nombre de processus de lecture (défaut : nombre de cœurs)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="relit tous les CSV et remplace les tables d'un seul coup")
+    parser.add_argument("--rebuild-parquet", action="store_true",
+                        help="reconstruit tout le store Parquet depuis distance.db")
+    args = parser.parse_args()
+
+    if args.rebuild_parquet:
+        export_parquet()
+    else:
+        export_all_vessels(workers=args.workers, rebuild=args.rebuild)
@@ -0,0 +1,126 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+from pathlib import Path
+
+import streamlit as st
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# plotly.js dans les exports HTML :
+# - "cdn"    : référence au CDN plotly (fichier de quelques Ko, ouverture en ligne)
+# - "inline" : bundle complet embarqué (plusieurs Mo, lisible hors ligne)
+PLOTLYJS_MODE = os.environ.get("JIFMAR_EXPORT_PLOTLYJS", "cdn")
+
+# Dossier d'enregistrement côté serveur (optionnel) : les HTML y partagent
+# un seul plotly.min.js au lieu d'embarquer chacun le bundle
+EXPORT_DIR = os.environ.get("JIFMAR_EXPORT_DIR")
+
+# Nombre de fichiers générés gardés en mémoire (clé : paramètres de la figure)
+EXPORT_CACHE_SIZE = 32
+
+HAS_PNG = find_spec("kaleido") is not None       # fig.to_image
+HAS_PARQUET = find_spec("pyarrow") is not None   # DataFrame.to_parquet
+
+
+# ---------------------------------------------------
+# 🧱 GÉNÉRATION (à la demande, mise en cache)
+# ---------------------------------------------------
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached(key, build):
+    """
+    Résultat de build() mémorisé sous key (None : pas de cache).
+    Les boutons appellent build dans un thread séparé, d'où le verrou.
+    """
+    if key is None:
+        return build()
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = build()
+    with _lock:
+        _cache[key] = value
+        while len(_cache) > EXPORT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+
+def figure_html(fig, plotlyjs=None):
+    import plotly.io as pio
+
+    return pio.to_html(fig, include_plotlyjs=plotlyjs or PLOTLYJS_MODE, full_html=True)
+
+
+def figure_png(fig):
+    return fig.to_image(format="png", scale=2)
+
+
+def frame_csv(df):
+    # BOM UTF-8 : accents lisibles à l'ouverture dans Excel
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def frame_parquet(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def save_figure(fig, name, folder=None):
+    """Enregistre <name>.html dans folder, à côté d'un plotly.min.js partagé."""
+    import plotly.io as pio
+
+    folder = Path(folder or EXPORT_DIR)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{name}.html"
+    pio.write_html(fig, file=str(path), include_plotlyjs="directory", auto_open=False)
+    return path
+
+
+# ---------------------------------------------------
+# 📤 BOUTONS D'EXPORT
+# ---------------------------------------------------
+
+def figure_downloads(fig, name, label, data=None, cache_key=None):
+    """
+    Boutons de téléchargement d'une figure : HTML, PNG (si kaleido est
+    installé), et données source en CSV / Parquet si data est fourni.
+
+    Rien n'est sérialisé pendant le rendu de la page : chaque fichier est
+    produit au clic, puis gardé en cache sous (cache_key, format) —
+    cache_key doit décrire la figure (navire, période, version des données…).
+    """
+    def key(fmt):
+        return None if cache_key is None else (name, fmt) + tuple(cache_key)
+
+    buttons = [("HTML", f"{name}.html", "text/html", lambda: cached(key("html"), lambda: figure_html(fig)))]
+    if HAS_PNG:
+        buttons.append(("PNG", f"{name}.png", "image/png", lambda: cached(key("png"), lambda: figure_png(fig))))
+    if data is not None:
+        buttons.append(("CSV", f"{name}.csv", "text/csv", lambda: cached(key("csv"), lambda: frame_csv(data))))
+        if HAS_PARQUET:
+            buttons.append(("Parquet", f"{name}.parquet", "application/octet-stream",
+                            lambda: cached(key("parquet"), lambda: frame_parquet(data))))
+
+    columns = st.columns(len(buttons) + (1 if EXPORT_DIR else 0))
+    for column, (fmt, file_name, mime, build) in zip(columns, buttons):
+        column.download_button(
+            f"📤 {label} ({fmt})",
+            data=build,
+            file_name=file_name,
+            mime=mime,
+            key=f"export-{name}-{fmt}",
+            on_click="ignore",
+        )
+
+    if EXPORT_DIR and columns[-1].button(f"💾 Enregistrer {label}", key=f"save-{name}"):
+        st.success(f"✅ Fichier sauvegardé : {save_figure(fig, name)}")
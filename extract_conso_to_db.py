@@ -1,24 +1,19 @@
-import pandas as pd
-import sqlite3
-import glob
 import os
 import math
 
-# === Configuration ===
-folder = r"C:\Users\SanyLou’eyZEMAL\OneDrive - Jifmar Offshore Services\Documents\Porjet_Monitoring"
-files = glob.glob(os.path.join(folder, "Consomation_*.xlsx"))
-db_path = os.path.join(folder, "conso.db")
+import bulk_load
+import config
+import efficiency
+from conso_parser import parse_all, workbook_year
+from queries import ensure_indexes
 
-MOIS_FR = ["janvier", "février", "mars", "avril", "mai", "juin",
-           "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+# === Configuration (chemins relatifs au projet, cf. config.py) ===
+files = config.conso_files()
+db_path = str(config.DB_CONSO)
 
-# === Création / Connexion DB ===
-conn = sqlite3.connect(db_path)
-cur = conn.cursor()
-
-# === Création des tables ===
-cur.execute("""
-CREATE TABLE IF NOT EXISTS conso_annuelle (
+# === Schéma ({table} : table vivante ou table de transit) ===
+CONSO_ANNUELLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     annee INTEGER,
     navire TEXT,
@@ -26,10 +21,10 @@ CREATE TABLE IF NOT EXISTS conso_annuelle (
     conso_l_mille REAL,
     UNIQUE(annee, navire) ON CONFLICT REPLACE
 )
-""")
+"""
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS conso_mensuelle (
+CONSO_MENSUELLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     annee INTEGER,
     mois TEXT,
@@ -37,64 +32,78 @@ CREATE TABLE IF NOT EXISTS conso_mensuelle (
     conso_m3 REAL,
     UNIQUE(annee, mois, navire) ON CONFLICT REPLACE
 )
-""")
-conn.commit()
-
-# === Extraction ===
-for f in files:
-    year = int(os.path.basename(f).split('_')[1].split('.')[0])
-    print(f"📄 Lecture : {os.path.basename(f)}")
-
-    try:
-        df = pd.read_excel(f, header=None)
-        ship_names = df.iloc[1, 1:].dropna().tolist()
+"""
 
-        # --- extraction consommation annuelle ---
-        conso_m3 = df.iloc[18, 1:len(ship_names)+1].tolist()
-        conso_L_mile = df.iloc[22, 1:len(ship_names)+1].tolist()
 
-        for ship, m3, lm in zip(ship_names, conso_m3, conso_L_mile):
+def extract_all(files=files, db_path=db_path, workers=None, distance_db=None):
+    """
+    Relit les classeurs et recharge conso_annuelle / conso_mensuelle, puis
+    efficiency_mensuelle pour les années relues (distance_db : défaut
+    distance.db à côté de conso.db).
+    """
+    # === Création / Connexion DB (WAL : les dashboards lisent pendant le chargement) ===
+    conn = bulk_load.connect_for_load(db_path)
 
-            try:
-                m3 = float(str(m3).replace(",", "."))
-            except:
-                m3 = 0.0
+    # === Création des tables ===
+    conn.execute(CONSO_ANNUELLE_SQL.format(table="conso_annuelle"))
+    conn.execute(CONSO_MENSUELLE_SQL.format(table="conso_mensuelle"))
+    conn.commit()
 
-            try:
-                lm = float(str(lm).replace(",", "."))
-            except:
-                lm = 0.0
+    # === Index de lecture pour les dashboards (annee, navire) ===
+    ensure_indexes(conn)
 
-            if math.isnan(lm):
-                lm = 0.0
+    # === Extraction ===
+    # Lecture parallèle des classeurs (seules les cellules utiles) ; les années
+    # dont le fichier n'a pas changé sont relues depuis le cache disque
+    annuelle, mensuelle, years = [], [], []
 
-            cur.execute("""
-            REPLACE INTO conso_annuelle (annee, navire, conso_m3, conso_l_mille)
-            VALUES (?, ?, ?, ?)
-            """, (year, ship.strip(), m3, lm))
+    for f, result, error in parse_all(files, workers):
+        print(f"📄 Lecture : {os.path.basename(f)}")
 
-        # --- extraction consommation mensuelle ---
-        for i, val in enumerate(df.iloc[:, 0]):
-            if isinstance(val, str) and val.strip().lower() in MOIS_FR:
-                mois = val.strip().capitalize()
-                row = df.iloc[i, 1:len(ship_names)+1].tolist()
+        if error is not None:
+            print(f"⚠️ Erreur lors de la lecture de {f} : {error}")
+            continue
 
-                for ship, conso in zip(ship_names, row):
-                    try:
-                        conso = float(str(conso).replace(",", "."))
-                    except:
-                        conso = 0.0
+        year = workbook_year(f)
+        years.append(year)
 
-                    cur.execute("""
-                    REPLACE INTO conso_mensuelle (annee, mois, navire, conso_m3)
-                    VALUES (?, ?, ?, ?)
-                    """, (year, mois, ship.strip(), conso))
-
-        conn.commit()
-        print(f"✅ {os.path.basename(f)} importé dans SQLite")
-
-    except Exception as e:
-        print(f"⚠️ Erreur lors de la lecture de {f} : {e}")
-
-conn.close()
-print("🎉 Extraction terminée — Base conso.db générée.")
+        # --- consommation annuelle ---
+        for ship, m3, lm in result["annuelle"]:
+            if math.isnan(lm):
+                lm = 0.0
+            annuelle.append((year, ship, m3, lm))
+
+        # --- consommation mensuelle ---
+        mensuelle += [(year, mois, ship, conso) for mois, ship, conso in result["mensuelle"]]
+
+        print(f"✅ {os.path.basename(f)} lu")
+
+    # === Chargement ===
+    # Tables de transit remplies en une transaction, puis basculées d'un coup ;
+    # les années non relues (fichier absent ou illisible) sont conservées
+    if years:
+        keep = f"annee NOT IN ({', '.join('?' * len(years))})"
+        bulk_load.replace_tables(conn, [
+            dict(table="conso_annuelle", create_sql=CONSO_ANNUELLE_SQL,
+                 columns=["annee", "navire", "conso_m3", "conso_l_mille"],
+                 rows=annuelle, keep_where=keep, keep_params=years),
+            dict(table="conso_mensuelle", create_sql=CONSO_MENSUELLE_SQL,
+                 columns=["annee", "mois", "navire", "conso_m3"],
+                 rows=mensuelle, keep_where=keep, keep_params=years),
+        ])
+        print(f"💾 {len(annuelle)} lignes annuelles et {len(mensuelle)} lignes mensuelles chargées")
+
+    conn.close()
+
+    # === Consommation spécifique mensuelle (jointure avec les distances GPS) ===
+    if years:
+        distance_db = distance_db or config.DB_DISTANCE
+        count = efficiency.refresh_efficiency(db_path, distance_db, years=years)
+        if count is not None:
+            print(f"⛽ {count} mois de consommation spécifique recalculés")
+
+
+# 🚀 Lancement
+if __name__ == "__main__":
+    extract_all()
+    print("🎉 Extraction terminée — Base conso.db générée.")
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+import rollups
+import simplify
+from sqlite_helpers import has_table
+from track_engine import hop_distances
+
+# ---------------------------------------------------
+# 🗃️ SCHÉMA COMPACT DES POSITIONS (vessels + fixes)
+# ---------------------------------------------------
+
+# Remplace l'ancienne table distance_evolution (navire en TEXT répété,
+# date en texte pandas, id AUTOINCREMENT, index UNIQUE sur 4 colonnes) :
+# - vessels : dimension navire (id entier)
+# - fixes   : une position par (vessel_id, epoch), table WITHOUT ROWID,
+#             donc rangée dans l'ordre de sa clé : une plage navire + dates
+#             est une lecture contiguë du B-tree, sans index secondaire
+SCHEMA_VERSION = 2
+
+# Coordonnées en virgule fixe (entiers, 1e-7 degré ≈ 1 cm) : 4 octets au
+# lieu des 8 d'un REAL dans le fichier SQLite
+COORD_SCALE = 10_000_000
+
+LEGACY_TABLE = "distance_evolution"
+
+
+def create_fixes_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vessels (
+            vessel_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    # Une position par seconde et par navire (epoch = colonne Timestamp
+    # des exports satcom) : la clé primaire fait aussi le dédoublonnage
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fixes (
+            vessel_id INTEGER NOT NULL,
+            epoch INTEGER NOT NULL,
+            distance REAL,
+            lat_e7 INTEGER,
+            lon_e7 INTEGER,
+            PRIMARY KEY (vessel_id, epoch)
+        ) WITHOUT ROWID
+    ''')
+    if not _is_legacy(cursor):
+        _create_view(cursor)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _is_legacy(cursor):
+    return has_table(cursor, LEGACY_TABLE)
+
+
+def _create_view(cursor):
+    # Vue décodée au nom de l'ancienne table, pour les requêtes à la main
+    # (navigateur SQLite, notebooks). Le code passe par fixes directement.
+    cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS {LEGACY_TABLE} AS
+        SELECT v.name AS vessel,
+               datetime(f.epoch, 'unixepoch') AS date,
+               f.distance AS distance,
+               {decoded_sql("latitude")} AS latitude,
+               {decoded_sql("longitude")} AS longitude
+        FROM fixes f JOIN vessels v ON v.vessel_id = f.vessel_id
+    ''')
+
+
+def migrate_legacy(conn, copy=True):
+    """
+    Migre une base à l'ancien schéma (table distance_evolution) : positions
+    recopiées dans vessels / fixes (copy=False : reconstruction complète,
+    fixes est déjà rempli), ancienne table supprimée, vue créée, cumuls et
+    traces simplifiées calculés pour l'historique repris.
+    Valide la transaction. Renvoie le nombre de positions reprises, ou
+    None si la base est déjà au nouveau schéma.
+    Le fichier ne rétrécit qu'après un VACUUM (python fixes.py <base>).
+    """
+    cursor = conn.cursor()
+    if not _is_legacy(cursor):
+        return None
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        create_fixes_tables(cursor)
+        count = 0
+        if copy:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO vessels (name)
+                SELECT DISTINCT vessel FROM {LEGACY_TABLE} WHERE vessel IS NOT NULL ORDER BY vessel
+            ''')
+            # Dates texte -> epoch (UTC, comme le Timestamp satcom) ; dates
+            # illisibles (epoch NULL) et doublons à la seconde ignorés
+            count = cursor.execute(f'''
+                INSERT OR IGNORE INTO fixes (vessel_id, epoch, distance, lat_e7, lon_e7)
+                SELECT v.vessel_id, CAST(strftime('%s', e.date) AS INTEGER), e.distance,
+                       CAST(round(e.latitude * {COORD_SCALE}) AS INTEGER),
+                       CAST(round(e.longitude * {COORD_SCALE}) AS INTEGER)
+                FROM {LEGACY_TABLE} e JOIN vessels v ON v.name = e.vessel
+                ORDER BY 1, 2
+            ''').rowcount
+            # Index spatial indexé par les anciens id : recréé ensuite par
+            # spatial.create_spatial_index
+            cursor.execute("DROP TABLE IF EXISTS distance_rtree")
+        cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+        _create_view(cursor)
+        if copy:
+            _backfill_derived(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return count
+
+
+def _backfill_derived(conn):
+    """
+    Cumuls (heure → année), sommes préfixes et traces simplifiées des
+    navires-années migrés qui n'en ont pas encore (historique antérieur à
+    la pyramide de cumuls). La colonne distance de l'ancienne table ne vaut
+    qu'un saut de quelques minutes par position échantillonnée : les
+    distances sont recalculées d'une position reprise à la suivante.
+    """
+    cursor = conn.cursor()
+    rollups.create_rollup_table(cursor)
+    simplify.create_simplified_table(cursor)
+
+    df = pd.read_sql_query(f'''
+        SELECT v.name AS vessel, f.epoch,
+               {decoded_sql("latitude")} AS latitude, {decoded_sql("longitude")} AS longitude
+        FROM fixes f JOIN vessels v ON v.vessel_id = f.vessel_id
+        ORDER BY f.vessel_id, f.epoch
+    ''', conn)
+    df["date"] = pd.to_datetime(df.pop("epoch"), unit="s")
+    df["distance"] = hop_distances(df["latitude"], df["longitude"], df["vessel"])
+    key = list(zip(df["vessel"], df["date"].dt.year))
+
+    covered = set(cursor.execute('''
+        SELECT DISTINCT vessel, CAST(substr(period, 1, 4) AS INTEGER)
+        FROM distance_rollup WHERE resolution = 'year'
+    '''))
+    rollups.update_rollups(conn, df[[k not in covered for k in key]])
+
+    covered = set(cursor.execute(
+        "SELECT DISTINCT vessel, CAST(substr(date, 1, 4) AS INTEGER) FROM track_simplified"
+    ))
+    simplify.update_simplified(conn, df[[k not in covered for k in key]], segment_col="vessel")
+
+
+# ---------------------------------------------------
+# 🔄 ENCODAGE / DÉCODAGE
+# ---------------------------------------------------
+
+def to_epoch(date):
+    """Date (texte, Timestamp, datetime) -> secondes UTC."""
+    return pd.Timestamp(date).value // 10**9
+
+
+def decoded_sql(column, alias="f"):
+    """Expression SQL d'une colonne de fixes, décodée (noms de l'ancienne table)."""
+    if column in ("latitude", "longitude"):
+        return f"{alias}.{column[:3]}_e7 / {COORD_SCALE}.0"
+    return f"{alias}.{column}"
+
+
+def encode_coord(values):
+    return np.round(np.asarray(values, dtype=np.float64) * COORD_SCALE).astype(np.int64)
+
+
+def vessel_id(cursor, name, create=False):
+    """Identifiant d'un navire (créé si create=True, sinon None s'il est inconnu)."""
+    if create:
+        cursor.execute("INSERT OR IGNORE INTO vessels (name) VALUES (?)", (name,))
+    row = cursor.execute("SELECT vessel_id FROM vessels WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def vessel_ids(conn, names=None):
+    """{nom: vessel_id} des navires connus (tous, ou ceux de names)."""
+    rows = conn.execute("SELECT name, vessel_id FROM vessels").fetchall()
+    if names is None:
+        return dict(rows)
+    names = set(names)
+    return {name: vid for name, vid in rows if name in names}
+
+
+if __name__ == "__main__":
+    import argparse
+    import sqlite3
+
+    import config
+
+    parser = argparse.ArgumentParser(description="Migration de distance.db vers le schéma vessels / fixes")
+    parser.add_argument("db", nargs="?", default=str(config.DB_DISTANCE))
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    migrated = migrate_legacy(conn)
+    if migrated is None:
+        print(f"✅ {args.db} est déjà au schéma {SCHEMA_VERSION}")
+    else:
+        import spatial
+
+        spatial.create_spatial_index(conn.cursor())
+        conn.commit()
+        print(f"🗃️ {migrated} positions migrées, compactage du fichier…")
+        conn.execute("VACUUM")
+        print(f"✅ {args.db} au schéma {SCHEMA_VERSION}")
+    conn.close()
@@ -1,64 +1,34 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-import glob
 import os
-import math
 
-folder = r"C:\Users\SanyLou’eyZEMAL\OneDrive - Jifmar Offshore Services\Documents\Porjet_Monitoring"
-files = glob.glob(os.path.join(folder, "Consomation_*.xlsx"))
+import config
+from conso_parser import load_conso
 
-data = []
+# Classeurs Consomation_<année>.xlsx du projet (cf. config.py)
+files = config.conso_files()
 
-for f in files:
-    year = os.path.basename(f).split('_')[1].split('.')[0]
-    try:
-        df = pd.read_excel(f, header=None)
+# Parseur partagé : lecture parallèle + cache disque par empreinte de fichier
+annuelle, _, erreurs = load_conso(files)
 
-        # --- noms des navires ---
-        ship_names = df.iloc[1, 1:].dropna().tolist()
-
-        # --- consommation annuelle (m³) ---
-        conso_m3 = df.iloc[18, 1:len(ship_names)+1].tolist()
-
-        # --- consommation litre/mille (ligne 22-23) ---
-        conso_L_mile = df.iloc[22, 1:len(ship_names)+1].tolist()
-
-        for ship, m3, lm in zip(ship_names, conso_m3, conso_L_mile):
-            try:
-                m3 = float(str(m3).replace(",", "."))
-            except:
-                m3 = 0.0
-
-            try:
-                lm = float(str(lm).replace(",", "."))
-            except:
-                lm = 0.0
-
-            # Si erreur (#DIV/0!) ou distance=0 => 0
-            if math.isnan(lm) or lm == 0:
-                lm = 0.0
-
-            data.append({
-                "Année": int(year),
-                "Navire": ship,
-                "Consommation_m3": m3,
-                "Conso_Litre_Mille": lm
-            })
-
-        print(f"[OK] {os.path.basename(f)} traité.")
-
-    except PermissionError:
-        print(f"[⛔] Fichier ouvert dans Excel : {f}")
-    except Exception as e:
-        print(f"[Erreur] {f} : {e}")
+for f, e in erreurs:
+    print(f"[Erreur] {f} : {e}")
+for f in sorted(set(files) - {f for f, _ in erreurs}):
+    print(f"[OK] {os.path.basename(f)} traité.")
 
 # === Vérif ===
-if not data:
+if annuelle.empty:
     print("❌ Aucune donnée trouvée.")
     exit()
 
-df_all = pd.DataFrame(data)
+df_all = annuelle.rename(columns={
+    "annee": "Année",
+    "navire": "Navire",
+    "conso_m3": "Consommation_m3",
+    "conso_l_mille": "Conso_Litre_Mille",
+})
+# Si erreur (#DIV/0!) ou distance=0 => 0
+df_all["Conso_Litre_Mille"] = df_all["Conso_Litre_Mille"].fillna(0.0)
 df_all = df_all.sort_values(by=["Navire", "Année"])
 
 # === Création de la figure avec deux graphes + un tableau ===
@@ -0,0 +1,157 @@
+import os
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# Panneau de mesures dans la barre latérale : JIFMAR_DEBUG=1 ou ?debug=1 dans l'URL
+DEBUG = os.environ.get("JIFMAR_DEBUG", "") not in ("", "0")
+
+# Journal JSON (une ligne par section et par rerun) : chemin de fichier,
+# ou "-" pour la sortie d'erreur. Non défini : pas de journal.
+PERF_LOG = os.environ.get("JIFMAR_PERF_LOG")
+
+# Nombre de reruns gardés par session pour les moyennes du panneau
+HISTORY_SIZE = 20
+
+logger = logging.getLogger("jifmar.perf")
+
+
+def _setup_logger():
+    if PERF_LOG is None or logger.handlers:
+        return
+    handler = logging.StreamHandler() if PERF_LOG == "-" else logging.FileHandler(PERF_LOG, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_setup_logger()
+
+
+# ---------------------------------------------------
+# ⏱️ SECTIONS / ÉTAPES
+# ---------------------------------------------------
+
+class Section:
+    """Une section du dashboard : étapes chronométrées, lignes, taille des figures."""
+
+    def __init__(self, name, measure_payload):
+        self.name = name
+        self.steps = {}
+        self.row_count = None
+        self.payload_bytes = 0
+        self.total_ms = 0.0
+        self._measure_payload = measure_payload
+
+    @contextmanager
+    def step(self, name):
+        """Étape : query (lecture / cache), transform (pandas), figure, render…"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.steps.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def rows(self, count):
+        self.row_count = (self.row_count or 0) + int(count)
+
+    def figure(self, fig):
+        # Taille de la figure sérialisée (≈ ce que reçoit le navigateur) ;
+        # mesurée seulement si le panneau ou le journal est actif
+        if self._measure_payload:
+            self.payload_bytes += len(fig.to_json())
+
+    def as_dict(self):
+        return {
+            "section": self.name,
+            "total_ms": round(self.total_ms, 2),
+            "steps_ms": {k: round(v, 2) for k, v in self.steps.items()},
+            "rows": self.row_count,
+            "payload_bytes": self.payload_bytes or None,
+        }
+
+
+class Run:
+    """Mesures d'un rerun d'une page Streamlit."""
+
+    def __init__(self, page):
+        self.page = page
+        self.sections = []
+        self.started = time.perf_counter()
+        self.debug = DEBUG or st.query_params.get("debug") not in (None, "", "0")
+        self.enabled = self.debug or bool(logger.handlers)
+        self.finished = False
+
+    @contextmanager
+    def section(self, name):
+        section = Section(name, self.enabled)
+        t0 = time.perf_counter()
+        try:
+            yield section
+        finally:
+            section.total_ms = (time.perf_counter() - t0) * 1000
+            self.sections.append(section)
+            # Section relancée seule (fragment st.fragment) après la fin du
+            # rerun complet : journalisée à part, le panneau ne bouge pas
+            if self.finished and self.enabled:
+                self._log([section.as_dict()], fragment=True)
+
+    def finish(self):
+        """Journal JSON + panneau de la barre latérale (si activés)."""
+        self.finished = True
+        if not self.enabled:
+            return
+        total_ms = (time.perf_counter() - self.started) * 1000
+        records = [s.as_dict() for s in self.sections]
+
+        self._log(records)
+        if logger.handlers:
+            logger.info(json.dumps({"ts": datetime.now().isoformat(timespec="milliseconds"),
+                                    "page": self.page, "section": "_page",
+                                    "total_ms": round(total_ms, 2)}))
+
+        if self.debug:
+            self._panel(records, total_ms)
+
+    def _log(self, records, fragment=False):
+        if not logger.handlers:
+            return
+        timestamp = datetime.now().isoformat(timespec="milliseconds")
+        extra = {"fragment": True} if fragment else {}
+        for record in records:
+            logger.info(json.dumps({"ts": timestamp, "page": self.page, **record, **extra}, ensure_ascii=False))
+
+    def _panel(self, records, total_ms):
+        history = st.session_state.setdefault("_perf_history", [])
+        history.append({r["section"]: r["total_ms"] for r in records})
+        del history[:-HISTORY_SIZE]
+
+        table = pd.DataFrame([
+            {
+                "section": r["section"],
+                "total (ms)": r["total_ms"],
+                **{f"{k} (ms)": v for k, v in r["steps_ms"].items()},
+                "lignes": r["rows"],
+                "figure (Ko)": round(r["payload_bytes"] / 1024, 1) if r["payload_bytes"] else None,
+            }
+            for r in records
+        ]).set_index("section")
+        table[f"moy. {len(history)} reruns (ms)"] = pd.DataFrame(history).mean().round(1)
+
+        with st.sidebar.expander("🐞 Performances", expanded=True):
+            st.caption(f"Rerun complet : {total_ms:.0f} ms")
+            st.dataframe(table)
+
+
+def start(page):
+    return Run(page)
@@ -0,0 +1,604 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+import downsample
+import fixes
+import rollups
+import segments
+import simplify
+import spatial
+import track_store
+from sqlite_helpers import has_table as _has_table
+from track_engine import haversine_nm
+
+# Nombre maximal de périodes par graphique : la résolution des cumuls
+# (heure / jour / mois / année) est choisie pour rester sous ce seuil,
+# le même que celui des courbes (pas de LTTB sur une série déjà agrégée)
+MAX_CHART_BUCKETS = downsample.MAX_POINTS_PER_TRACE
+
+# Nombre maximal de points envoyés à une carte, quelle que soit la période
+MAP_POINT_BUDGET = int(os.environ.get("JIFMAR_MAP_POINT_BUDGET", 5000))
+
+# Nombre maximal d'entrées gardées par loader en cache (st.cache_data) :
+# les combinaisons de filtres les moins récentes et les anciennes versions
+# des données sont évincées
+CACHE_MAX_ENTRIES = int(os.environ.get("JIFMAR_CACHE_MAX_ENTRIES", 32))
+
+# Positions pleine résolution en mémoire (compact=True) : navire catégoriel,
+# float32 (~1 m de précision sur les coordonnées), date en epoch (secondes)
+COMPACT_FLOATS = ("distance", "latitude", "longitude")
+
+# ---------------------------------------------------
+# 📌 INDEX
+# ---------------------------------------------------
+
+# Index couvrants : les requêtes des dashboards (navire + plage de dates,
+# année + navire) sont servies par l'index seul, sans relire la table.
+# Les positions (fixes, WITHOUT ROWID) sont rangées par leur clé
+# (vessel_id, epoch) : pas d'index secondaire
+INDEXES = {
+    "segments": [
+        """CREATE INDEX IF NOT EXISTS idx_segments_vessel_state
+           ON segments (vessel, state, date_start, date_end, distance, duration_s)""",
+    ],
+    "conso_mensuelle": [
+        """CREATE INDEX IF NOT EXISTS idx_conso_mensuelle_annee_navire
+           ON conso_mensuelle (annee, navire, mois, conso_m3)""",
+    ],
+    "efficiency_mensuelle": [
+        """CREATE INDEX IF NOT EXISTS idx_efficiency_annee_navire
+           ON efficiency_mensuelle (annee, navire, mois, conso_m3, distance_nm, conso_l_mille)""",
+    ],
+    "conso_annuelle": [
+        """CREATE INDEX IF NOT EXISTS idx_conso_annuelle_annee_navire
+           ON conso_annuelle (annee, navire, conso_m3, conso_l_mille)""",
+    ],
+}
+
+
+def ensure_indexes(conn):
+    """Crée les index manquants pour les tables présentes dans la base."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, statements in INDEXES.items():
+        if table in tables:
+            for sql in statements:
+                conn.execute(sql)
+    conn.commit()
+
+
+def prepare_db(db_path):
+    """
+    Ajoute les index manquants à une base existante (au démarrage d'un
+    dashboard). Sans effet si la base est en lecture seule ou verrouillée
+    par l'ETL. La migration de schéma reste à l'ETL (cf. fixes.py).
+    """
+    try:
+        conn = sqlite3.connect(db_path, timeout=1)
+        ensure_indexes(conn)
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def legacy_schema(db_path):
+    """Vrai si la base de positions est encore à l'ancien schéma (distance_evolution)."""
+    if not os.path.exists(db_path):
+        return False
+    conn = connect(db_path)
+    legacy = _has_table(conn, fixes.LEGACY_TABLE)
+    release(conn, db_path)
+    return legacy
+
+
+def connect(db_path):
+    # Connexion en lecture seule : les dashboards n'écrivent jamais.
+    # Une connexion déjà ouverte (pool de l'API) est réutilisée telle quelle.
+    if isinstance(db_path, sqlite3.Connection):
+        return db_path
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def release(conn, db_path):
+    # Ne ferme que les connexions ouvertes par connect()
+    if conn is not db_path:
+        conn.close()
+
+
+# ---------------------------------------------------
+# 🔖 VERSION DES DONNÉES
+# ---------------------------------------------------
+
+def data_version(db_path):
+    """
+    Empreinte bon marché d'une base : taille + date de modification du
+    fichier et de son journal WAL. Change à chaque ingestion ; passée en
+    paramètre des loaders en cache, elle les invalide sans redémarrage.
+    """
+    parts = []
+    for path in (str(db_path), f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(parts)
+
+
+def track_version(db_path):
+    """Version des positions : distance.db, plus le store Parquet s'il est utilisé."""
+    if track_store.TRACK_BACKEND == "parquet":
+        return data_version(db_path) + track_store.store_version()
+    return data_version(db_path)
+
+
+def _in_clause(column, values):
+    values = list(values)
+    return f"{column} IN ({', '.join('?' * len(values))})", values
+
+
+# ---------------------------------------------------
+# 📍 DISTANCES / POSITIONS
+# ---------------------------------------------------
+
+def track_vessels(db_path):
+    if track_store.TRACK_BACKEND == "parquet":
+        return sorted({vessel for vessel, _ in track_store.list_partitions()})
+
+    conn = connect(db_path)
+    rows = conn.execute(
+        """SELECT name FROM vessels v
+           WHERE EXISTS (SELECT 1 FROM fixes f WHERE f.vessel_id = v.vessel_id)
+           ORDER BY name"""
+    ).fetchall()
+    release(conn, db_path)
+    return [r[0] for r in rows]
+
+
+def track_years(db_path, vessels=None):
+    """Années couvertes par les positions (pour les sliders)."""
+    if track_store.TRACK_BACKEND == "parquet":
+        return sorted({year for vessel, year in track_store.list_partitions()
+                       if vessels is None or vessel in vessels})
+
+    conn = connect(db_path)
+    years = set()
+    # MIN / MAX par navire : deux lectures de la clé primaire chacun
+    for vessel_id in fixes.vessel_ids(conn, vessels).values():
+        first, last = conn.execute(
+            "SELECT MIN(epoch), MAX(epoch) FROM fixes WHERE vessel_id = ?", (vessel_id,)
+        ).fetchone()
+        if first is not None and last is not None:
+            years.update(range(epoch_to_datetime(first).year, epoch_to_datetime(last).year + 1))
+    release(conn, db_path)
+    return sorted(years)
+
+
+def compact_tracks(df):
+    """
+    Version compacte d'un DataFrame de positions (plusieurs fois plus léger
+    par entrée de cache) : vessel en category, distance / coordonnées en
+    float32, date remplacée par epoch (int64, secondes UTC).
+    """
+    if "vessel" in df.columns:
+        df["vessel"] = df["vessel"].astype("category")
+    for col in COMPACT_FLOATS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    if "date" in df.columns:
+        df["date"] = df["date"].dt.as_unit("s").astype("int64")
+        df.rename(columns={"date": "epoch"}, inplace=True)
+    if "epoch" in df.columns:
+        df["epoch"] = df["epoch"].astype("int64")
+    return df
+
+
+def epoch_to_datetime(epoch):
+    """Colonne epoch -> dates (affichage seulement, les calculs restent en entiers)."""
+    return pd.to_datetime(epoch, unit="s")
+
+
+def fetch_tracks(db_path, vessels, date_start=None, date_end=None,
+                 columns=("date", "distance", "latitude", "longitude"), compact=False):
+    """
+    Positions des navires demandés sur [date_start, date_end[, triées par
+    navire puis date. Le filtrage est fait par SQLite (ou par partitions
+    Parquet), jamais en pandas.
+    compact=True : représentation compacte (voir compact_tracks), la date
+    devient la colonne epoch.
+    """
+    columns = list(columns)
+
+    if track_store.TRACK_BACKEND == "parquet":
+        start = pd.Timestamp(date_start) if date_start is not None else None
+        end = pd.Timestamp(date_end) if date_end is not None else None
+        df = track_store.read_tracks(
+            vessels=vessels,
+            year_start=start.year if start is not None else None,
+            year_end=(end - pd.Timedelta(1, "ns")).year if end is not None else None,
+            columns=sorted(set(columns) | {"date"}),
+        )
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        mask = df["date"].notna()
+        if start is not None:
+            mask &= df["date"] >= start
+        if end is not None:
+            mask &= df["date"] < end
+        df = df.loc[mask, ["vessel"] + columns].reset_index(drop=True)
+        return compact_tracks(df) if compact else df
+
+    where, params = _in_clause("v.name", vessels)
+    if date_start is not None:
+        where += " AND f.epoch >= ?"
+        params.append(fixes.to_epoch(date_start))
+    if date_end is not None:
+        where += " AND f.epoch < ?"
+        params.append(fixes.to_epoch(date_end))
+
+    # Plage (vessel_id, epoch) de la clé primaire : lecture contiguë du
+    # B-tree ; la date reste un entier jusqu'à pandas (pas de texte à analyser)
+    select = ["f.epoch AS epoch" if col == "date" else f"{fixes.decoded_sql(col)} AS {col}"
+              for col in columns]
+
+    conn = connect(db_path)
+    df = pd.read_sql_query(
+        f"""SELECT v.name AS vessel, {', '.join(select)}
+            FROM vessels v JOIN fixes f ON f.vessel_id = v.vessel_id
+            WHERE {where} ORDER BY v.name, f.epoch""",
+        conn, params=params,
+    )
+    release(conn, db_path)
+
+    if compact:
+        return compact_tracks(df)
+
+    if "epoch" in df.columns:
+        df["epoch"] = epoch_to_datetime(df["epoch"])
+        df.rename(columns={"epoch": "date"}, inplace=True)
+    return df
+
+
+def fetch_distance_series(db_path, vessels, date_start, date_end, max_buckets=MAX_CHART_BUCKETS):
+    """
+    Distance parcourue par période (vessel, date, distance, fixes) sur
+    [date_start, date_end[, lue dans la pyramide distance_rollup à la
+    résolution la plus fine qui tient dans max_buckets périodes.
+    Renvoie (DataFrame, résolution).
+    """
+    resolution = rollups.pick_resolution(date_start, date_end, max_buckets)
+
+    conn = connect(db_path)
+    has_rollup = _has_table(conn, "distance_rollup")
+
+    if not has_rollup:
+        release(conn, db_path)
+        df = fetch_tracks(db_path, vessels, date_start, date_end, columns=("date", "distance"))
+        return rollups.aggregate_fixes(df, resolution), resolution
+
+    where, params = _in_clause("vessel", vessels)
+    df = pd.read_sql_query(
+        f"""SELECT vessel, period AS date, distance, fixes FROM distance_rollup
+            WHERE {where} AND resolution = ? AND period >= ? AND period < ?
+            ORDER BY vessel, period""",
+        conn, params=params + [resolution, str(pd.Timestamp(date_start)), str(pd.Timestamp(date_end))],
+    )
+    release(conn, db_path)
+    df["date"] = pd.to_datetime(df["date"])
+    return df, resolution
+
+
+# Somme préfixe d'un navire juste avant un jour (0 avant le début de l'historique)
+PREFIX_BEFORE_SQL = """COALESCE((SELECT b.distance_cum FROM distance_prefix b
+                                 WHERE b.vessel = v.vessel AND b.day < ?
+                                 ORDER BY b.day DESC LIMIT 1), 0)"""
+
+
+def _vessel_values(vessels):
+    vessels = list(vessels)
+    return f"v (vessel) AS (VALUES {', '.join('(?)' for _ in vessels)})", vessels
+
+
+def fetch_distance_total(db_path, vessels, date_start=None, date_end=None):
+    """
+    Distance parcourue par navire (vessel, distance) sur [date_start,
+    date_end[ (un jour compte s'il commence dans la fenêtre ; sans borne :
+    depuis le début / jusqu'à la fin de l'historique).
+    Différence de deux sommes préfixes lues sur la clé primaire : temps
+    constant quelle que soit la longueur de l'historique.
+    """
+    start = str(pd.Timestamp(date_start)) if date_start is not None else ""
+    end = str(pd.Timestamp(date_end)) if date_end is not None else "9999"
+    vessels = list(vessels)
+    if not vessels:
+        return pd.DataFrame(columns=["vessel", "distance"])
+    values, params = _vessel_values(vessels)
+
+    conn = connect(db_path)
+    if _has_table(conn, "distance_prefix"):
+        sql = f"""WITH {values}
+                  SELECT v.vessel, {PREFIX_BEFORE_SQL} - {PREFIX_BEFORE_SQL} AS distance
+                  FROM v"""
+        params += [end, start]
+    else:
+        # Base antérieure aux sommes préfixes : somme des cumuls journaliers
+        sql = f"""WITH {values}
+                  SELECT v.vessel, COALESCE(SUM(r.distance), 0) AS distance
+                  FROM v LEFT JOIN distance_rollup r
+                         ON r.vessel = v.vessel AND r.resolution = 'day'
+                        AND r.period >= ? AND r.period < ?
+                  GROUP BY v.vessel"""
+        params += [start, end]
+    df = pd.read_sql_query(sql, conn, params=params)
+    release(conn, db_path)
+    return df
+
+
+def fetch_distance_cumulative(db_path, vessels, date_start, date_end, max_buckets=MAX_CHART_BUCKETS):
+    """
+    Distance cumulée depuis date_start (vessel, date, distance_cum), une
+    valeur par période (fin de période) à la résolution choisie comme
+    fetch_distance_series. Lue dans distance_prefix moins la somme
+    préfixe d'avant la fenêtre : pas de cumsum sur tout l'historique.
+    Renvoie (DataFrame, résolution).
+    """
+    resolution = rollups.pick_resolution(date_start, date_end, max_buckets)
+    vessels = list(vessels)
+    if not vessels:
+        return pd.DataFrame(columns=["vessel", "date", "distance_cum"]), resolution
+
+    conn = connect(db_path)
+    has_prefix = _has_table(conn, "distance_prefix")
+    release(conn, db_path)
+
+    if resolution == "hour" or not has_prefix:
+        # Fenêtre courte (ou ancienne base) : cumul des quelques périodes lues
+        df, resolution = fetch_distance_series(db_path, vessels, date_start, date_end, max_buckets)
+        df["distance_cum"] = df["distance"].astype("float64").groupby(df["vessel"]).cumsum()
+        return df[["vessel", "date", "distance_cum"]], resolution
+
+    values, params = _vessel_values(vessels)
+    start, end = str(pd.Timestamp(date_start)), str(pd.Timestamp(date_end))
+    # Sommes préfixes croissantes : MAX = valeur du dernier jour de la période
+    period = rollups.PERIOD_SQL[resolution].replace("period", "p.day")
+
+    conn = connect(db_path)
+    df = pd.read_sql_query(
+        f"""WITH {values},
+                 base AS (SELECT v.vessel, {PREFIX_BEFORE_SQL} AS cum FROM v)
+            SELECT p.vessel, {period} AS date, MAX(p.distance_cum) - base.cum AS distance_cum
+            FROM distance_prefix p JOIN base ON base.vessel = p.vessel
+            WHERE p.day >= ? AND p.day < ?
+            GROUP BY p.vessel, date
+            ORDER BY p.vessel, date""",
+        conn, params=params + [start, start, end],
+    )
+    release(conn, db_path)
+    df["date"] = pd.to_datetime(df["date"])
+    return df, resolution
+
+
+def fetch_map_track(db_path, vessels, date_start, date_end, max_points=MAP_POINT_BUDGET):
+    """
+    Trace simplifiée (vessel, date, latitude, longitude) pour les cartes :
+    niveau Douglas–Peucker le plus détaillé qui tient dans max_points.
+    Renvoie (DataFrame, niveau) ; niveau None = repli sur les points bruts.
+    """
+    window = [str(pd.Timestamp(date_start)), str(pd.Timestamp(date_end))]
+    where, params = _in_clause("vessel", vessels)
+
+    conn = connect(db_path)
+    has_simplified = _has_table(conn, "track_simplified")
+
+    if not has_simplified:
+        release(conn, db_path)
+        df = fetch_tracks(db_path, vessels, date_start, date_end, columns=("date", "latitude", "longitude"))
+        return simplify.decimate(df, max_points), None
+
+    # Nombre de points par niveau sur la fenêtre (lecture de la clé primaire)
+    counts = dict(conn.execute(
+        f"""SELECT level, COUNT(*) FROM track_simplified
+            WHERE {where} AND date >= ? AND date < ? GROUP BY level""",
+        params + window,
+    ).fetchall())
+    fitting = [lvl for lvl, n in counts.items() if n <= max_points]
+    level = max(fitting) if fitting else min(counts, default=0)
+
+    df = pd.read_sql_query(
+        f"""SELECT vessel, date, latitude, longitude FROM track_simplified
+            WHERE {where} AND level = ? AND date >= ? AND date < ?
+            ORDER BY vessel, date""",
+        conn, params=params + [level] + window,
+    )
+    release(conn, db_path)
+    df["date"] = pd.to_datetime(df["date"])
+    return simplify.decimate(df, max_points), level
+
+
+def fetch_segments(db_path, vessels, date_start, date_end, state=None, merge=True):
+    """
+    Segments traversée / escale qui recoupent [date_start, date_end[ (une
+    requête sur la clé primaire). merge=True : les segments coupés par le
+    découpage en fichiers mensuels sont refusionnés.
+    """
+    where, params = _in_clause("vessel", vessels)
+    where += " AND date_start < ? AND date_end >= ?"
+    params += [str(pd.Timestamp(date_end)), str(pd.Timestamp(date_start))]
+    if state is not None:
+        where += " AND state = ?"
+        params.append(state)
+
+    conn = connect(db_path)
+    has_segments = _has_table(conn, "segments")
+    if not has_segments:
+        release(conn, db_path)
+        return pd.DataFrame(columns=[c for c in segments.SEGMENT_COLUMNS if c != "source"])
+
+    df = pd.read_sql_query(
+        f"SELECT * FROM segments WHERE {where} ORDER BY vessel, date_start",
+        conn, params=params,
+    )
+    release(conn, db_path)
+
+    if merge:
+        df = segments.merge_contiguous(df)
+    else:
+        df = df.drop(columns="source")
+    for col in ("date_start", "date_end"):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+# ---------------------------------------------------
+# 🌐 ZONES (rectangle / rayon)
+# ---------------------------------------------------
+
+def fetch_area(db_path, lat_min, lat_max, lon_min, lon_max, vessels=None,
+               date_start=None, date_end=None):
+    """
+    Positions (vessel, date, distance, latitude, longitude) dans un
+    rectangle, triées par navire puis date. Les candidats viennent de la
+    R*Tree (boîtes en float32, arrondies vers l'extérieur), puis sont
+    filtrés sur les coordonnées exactes ; sans R*Tree, simple balayage.
+    """
+    box = [float(lat_min), float(lat_max), float(lon_min), float(lon_max)]
+    lat, lon = fixes.decoded_sql("latitude"), fixes.decoded_sql("longitude")
+    where = f"{lat} BETWEEN ? AND ? AND {lon} BETWEEN ? AND ?"
+    params = list(box)
+    if vessels is not None:
+        clause, values = _in_clause("v.name", vessels)
+        where += f" AND {clause}"
+        params += values
+    if date_start is not None:
+        where += " AND f.epoch >= ?"
+        params.append(fixes.to_epoch(date_start))
+    if date_end is not None:
+        where += " AND f.epoch < ?"
+        params.append(fixes.to_epoch(date_end))
+
+    select = f"""SELECT v.name AS vessel, f.epoch AS date, f.distance,
+                        {lat} AS latitude, {lon} AS longitude"""
+    conn = connect(db_path)
+    if spatial.has_spatial_index(conn):
+        # id R*Tree -> clé primaire de fixes (cf. spatial.rtree_id_sql)
+        sql = f"""{select}
+                  FROM {spatial.RTREE_TABLE} r
+                  JOIN fixes f ON f.vessel_id = r.id >> {spatial.ID_SHIFT}
+                              AND f.epoch = r.id & {(1 << spatial.ID_SHIFT) - 1}
+                  JOIN vessels v ON v.vessel_id = f.vessel_id
+                  WHERE r.lat_max >= ? AND r.lat_min <= ? AND r.lon_max >= ? AND r.lon_min <= ?
+                    AND {where}
+                  ORDER BY v.name, f.epoch"""
+        params = box + params
+    else:
+        sql = f"""{select}
+                  FROM fixes f JOIN vessels v ON v.vessel_id = f.vessel_id
+                  WHERE {where} ORDER BY v.name, f.epoch"""
+
+    df = pd.read_sql_query(sql, conn, params=params)
+    release(conn, db_path)
+    df["date"] = epoch_to_datetime(df["date"])
+    return df
+
+
+def fetch_radius(db_path, lat, lon, radius_nm, vessels=None, date_start=None, date_end=None):
+    """
+    Positions à moins de radius_nm milles de (lat, lon) : rectangle
+    englobant via fetch_area, puis distance exacte (colonne range_nm).
+    """
+    df = fetch_area(db_path, *spatial.bbox_around(lat, lon, radius_nm),
+                    vessels=vessels, date_start=date_start, date_end=date_end)
+    df["range_nm"] = haversine_nm(lat, lon, df["latitude"].to_numpy(), df["longitude"].to_numpy())
+    return df[df["range_nm"] <= radius_nm].reset_index(drop=True)
+
+
+def year_window(year_start, year_end):
+    """Bornes [1er janvier year_start, 1er janvier year_end + 1[."""
+    return f"{int(year_start)}-01-01", f"{int(year_end) + 1}-01-01"
+
+
+# ---------------------------------------------------
+# ⛽ CONSOMMATION
+# ---------------------------------------------------
+
+def conso_navires(db_path, table="conso_annuelle"):
+    conn = connect(db_path)
+    rows = conn.execute(f"SELECT DISTINCT navire FROM {table} ORDER BY navire").fetchall()
+    release(conn, db_path)
+    return [r[0] for r in rows]
+
+
+def conso_annees(db_path, table="conso_annuelle"):
+    conn = connect(db_path)
+    rows = conn.execute(f"SELECT DISTINCT annee FROM {table} ORDER BY annee").fetchall()
+    release(conn, db_path)
+    return [int(r[0]) for r in rows]
+
+
+def fetch_conso_annuelle(db_path, navires=None, annee_min=None, annee_max=None):
+    where, params = "1 = 1", []
+    if navires is not None:
+        clause, values = _in_clause("navire", navires)
+        where += f" AND {clause}"
+        params += values
+    if annee_min is not None:
+        where += " AND annee >= ?"
+        params.append(int(annee_min))
+    if annee_max is not None:
+        where += " AND annee <= ?"
+        params.append(int(annee_max))
+
+    conn = connect(db_path)
+    df = pd.read_sql_query(
+        f"SELECT annee, navire, conso_m3, conso_l_mille FROM conso_annuelle "
+        f"WHERE {where} ORDER BY annee, navire",
+        conn, params=params,
+    )
+    release(conn, db_path)
+    df["annee"] = df["annee"].astype(int)
+    return df
+
+
+def fetch_conso_mensuelle(db_path, annee, navires=None):
+    where, params = "annee = ?", [int(annee)]
+    if navires is not None:
+        clause, values = _in_clause("navire", navires)
+        where += f" AND {clause}"
+        params += values
+
+    conn = connect(db_path)
+    df = pd.read_sql_query(
+        f"SELECT annee, mois, navire, conso_m3 FROM conso_mensuelle "
+        f"WHERE {where} ORDER BY annee, mois, navire",
+        conn, params=params,
+    )
+    release(conn, db_path)
+    return df
+
+
+def fetch_efficiency_mensuelle(db_path, annee, navires=None):
+    """
+    Consommation spécifique mensuelle pré-calculée (efficiency_mensuelle) :
+    annee, mois (1-12), navire, conso_m3, distance_nm, conso_l_mille.
+    DataFrame vide si la table n'existe pas encore.
+    """
+    where, params = "annee = ?", [int(annee)]
+    if navires is not None:
+        clause, values = _in_clause("navire", navires)
+        where += f" AND {clause}"
+        params += values
+
+    columns = ["annee", "mois", "navire", "conso_m3", "distance_nm", "conso_l_mille"]
+    conn = connect(db_path)
+    has_table = _has_table(conn, "efficiency_mensuelle")
+    if not has_table:
+        release(conn, db_path)
+        return pd.DataFrame(columns=columns)
+
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(columns)} FROM efficiency_mensuelle "
+        f"WHERE {where} ORDER BY annee, mois, navire",
+        conn, params=params,
+    )
+    release(conn, db_path)
+    return df
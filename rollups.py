@@ -0,0 +1,205 @@
+import pandas as pd
+
+# ---------------------------------------------------
+# 📊 PYRAMIDE DE CUMULS (heure / jour / mois / année)
+# ---------------------------------------------------
+
+# Résolutions de la plus fine à la plus grossière, avec leur durée
+# approximative (pour choisir la résolution d'un graphique)
+RESOLUTIONS = ["hour", "day", "month", "year"]
+RESOLUTION_SPAN = {
+    "hour": pd.Timedelta(hours=1),
+    "day": pd.Timedelta(days=1),
+    "month": pd.Timedelta(days=30.44),
+    "year": pd.Timedelta(days=365.25),
+}
+
+RESOLUTION_LABELS = {
+    "hour": "horaire",
+    "day": "journalière",
+    "month": "mensuelle",
+    "year": "annuelle",
+}
+
+# Début de période calculé en SQL à partir du début d'heure
+# ('YYYY-MM-DD HH:00:00'), même format texte que les dates du manifeste
+PERIOD_SQL = {
+    "day": "substr(period, 1, 10) || ' 00:00:00'",
+    "month": "substr(period, 1, 7) || '-01 00:00:00'",
+    "year": "substr(period, 1, 4) || '-01-01 00:00:00'",
+}
+
+
+def create_rollup_table(cursor):
+    # Une ligne par navire / résolution / période : distance totale
+    # (tous les sauts GPS, pas seulement les points échantillonnés),
+    # nombre de points et emprise géographique
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS distance_rollup (
+            vessel TEXT,
+            resolution TEXT,
+            period TEXT,
+            distance REAL,
+            fixes INTEGER,
+            lat_min REAL,
+            lat_max REAL,
+            lon_min REAL,
+            lon_max REAL,
+            PRIMARY KEY (vessel, resolution, period)
+        ) WITHOUT ROWID
+    ''')
+
+
+def create_prefix_table(cursor):
+    # Somme préfixe journalière : distance totale d'un navire depuis le
+    # début de son historique jusqu'à la fin du jour. La distance d'une
+    # fenêtre est la différence de deux lectures de la clé primaire.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS distance_prefix (
+            vessel TEXT,
+            day TEXT,
+            distance_cum REAL,
+            PRIMARY KEY (vessel, day)
+        ) WITHOUT ROWID
+    ''')
+
+
+def update_prefix(cursor, vessel, start=None):
+    """
+    Recalcule les sommes préfixes d'un navire à partir du jour start
+    (None : tout l'historique) depuis les cumuls journaliers. Les jours
+    suivants sont décalés d'autant : on repart du premier jour touché.
+    """
+    start = start or ""
+    base = cursor.execute('''
+        SELECT distance_cum FROM distance_prefix
+        WHERE vessel = ? AND day < ? ORDER BY day DESC LIMIT 1
+    ''', (vessel, start)).fetchone()
+    cursor.execute("DELETE FROM distance_prefix WHERE vessel = ? AND day >= ?", (vessel, start))
+    cursor.execute('''
+        INSERT INTO distance_prefix (vessel, day, distance_cum)
+        SELECT vessel, period, ? + SUM(distance) OVER (ORDER BY period)
+        FROM distance_rollup
+        WHERE vessel = ? AND resolution = 'day' AND period >= ?
+    ''', (base[0] if base else 0.0, vessel, start))
+
+
+def hourly_rollup(df, lat_col="latitude", lon_col="longitude"):
+    """Cumuls horaires d'un DataFrame pleine résolution (vessel, date, distance)."""
+    grouped = df.groupby(["vessel", df["date"].dt.floor("h").rename("period")])
+    out = grouped.agg(
+        distance=("distance", "sum"),
+        fixes=("distance", "size"),
+        lat_min=(lat_col, "min"),
+        lat_max=(lat_col, "max"),
+        lon_min=(lon_col, "min"),
+        lon_max=(lon_col, "max"),
+    ).reset_index()
+    out["period"] = out["period"].astype(str)
+    out.insert(1, "resolution", "hour")
+    return out
+
+
+def update_rollups(conn, df, replaced=(), lat_col="latitude", lon_col="longitude", hops=()):
+    """
+    Met à jour la pyramide après une ingestion.
+
+    - df       : nouveaux points pleine résolution (vessel, date, distance, lat, lon)
+    - replaced : plages (vessel, date_min, date_max) dont les points ont été
+                 supprimés (fichier source modifié)
+    - hops     : corrections (vessel, date, delta) de la distance d'un point
+                 déjà compté (premier saut d'un fichier suivant, re-raccordé)
+
+    Les nouveaux points s'ajoutent aux heures existantes (une heure peut être
+    complétée par plusieurs lots d'un fichier en cours d'écriture), puis
+    jours / mois / années sont recalculés en SQL depuis les heures,
+    uniquement pour les années touchées.
+    """
+    cursor = conn.cursor()
+    create_rollup_table(cursor)
+    create_prefix_table(cursor)
+
+    years = set()
+
+    for vessel, date_min, date_max in replaced:
+        cursor.execute('''
+            DELETE FROM distance_rollup
+            WHERE vessel = ? AND resolution = 'hour' AND period BETWEEN ? AND ?
+        ''', (vessel, str(pd.Timestamp(date_min).floor("h")), date_max))
+        years.update((vessel, y) for y in range(int(date_min[:4]), int(date_max[:4]) + 1))
+
+    if not df.empty:
+        hourly = hourly_rollup(df, lat_col, lon_col)
+        cursor.executemany('''
+            INSERT INTO distance_rollup
+                (vessel, resolution, period, distance, fixes, lat_min, lat_max, lon_min, lon_max)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (vessel, resolution, period) DO UPDATE SET
+                distance = distance + excluded.distance,
+                fixes = fixes + excluded.fixes,
+                lat_min = min(lat_min, excluded.lat_min),
+                lat_max = max(lat_max, excluded.lat_max),
+                lon_min = min(lon_min, excluded.lon_min),
+                lon_max = max(lon_max, excluded.lon_max)
+        ''', hourly.values.tolist())
+        years.update(zip(hourly["vessel"], hourly["period"].str[:4].astype(int)))
+
+    for vessel, date, delta in hops:
+        period = str(pd.Timestamp(date).floor("h"))
+        cursor.execute('''
+            UPDATE distance_rollup SET distance = distance + ?
+            WHERE vessel = ? AND resolution = 'hour' AND period = ?
+        ''', (delta, vessel, period))
+        years.add((vessel, int(period[:4])))
+
+    for vessel, year in sorted(years):
+        start, end = f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00"
+        for resolution in RESOLUTIONS[1:]:
+            cursor.execute('''
+                DELETE FROM distance_rollup
+                WHERE vessel = ? AND resolution = ? AND period >= ? AND period < ?
+            ''', (vessel, resolution, start, end))
+            cursor.execute(f'''
+                INSERT INTO distance_rollup
+                    (vessel, resolution, period, distance, fixes, lat_min, lat_max, lon_min, lon_max)
+                SELECT vessel, ?, {PERIOD_SQL[resolution]}, SUM(distance), SUM(fixes),
+                       MIN(lat_min), MAX(lat_max), MIN(lon_min), MAX(lon_max)
+                FROM distance_rollup
+                WHERE vessel = ? AND resolution = 'hour' AND period >= ? AND period < ?
+                GROUP BY {PERIOD_SQL[resolution]}
+            ''', (resolution, vessel, start, end))
+
+    # Sommes préfixes à partir de la première année touchée de chaque navire ;
+    # base antérieure aux sommes préfixes : calcul complet une fois
+    if cursor.execute("SELECT 1 FROM distance_prefix LIMIT 1").fetchone() is None:
+        first_years = {vessel: None for (vessel,) in cursor.execute(
+            "SELECT DISTINCT vessel FROM distance_rollup WHERE resolution = 'day'").fetchall()}
+    else:
+        first_years = {}
+        for vessel, year in sorted(years, reverse=True):
+            first_years[vessel] = year
+    for vessel, year in sorted(first_years.items()):
+        update_prefix(cursor, vessel, f"{year}-01-01 00:00:00" if year is not None else None)
+
+    return len(years)
+
+
+def pick_resolution(date_start, date_end, max_buckets):
+    """
+    Résolution la plus fine dont le nombre de périodes sur la fenêtre
+    reste sous max_buckets (sinon la plus grossière, l'année).
+    """
+    span = pd.Timestamp(date_end) - pd.Timestamp(date_start)
+    for resolution in RESOLUTIONS:
+        if span / RESOLUTION_SPAN[resolution] <= max_buckets:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def aggregate_fixes(df, resolution):
+    """Repli pandas quand distance_rollup n'existe pas encore (ancienne base)."""
+    freq = {"hour": "h", "day": "D", "month": "M", "year": "Y"}[resolution]
+    periods = df["date"].dt.to_period(freq).dt.start_time
+    out = df.groupby(["vessel", periods.rename("date")])["distance"].agg(["sum", "size"])
+    out.columns = ["distance", "fixes"]
+    return out.reset_index()
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------
+# 🧭 SEGMENTATION TRAVERSÉES / ESCALES (SOG + COG)
+# ---------------------------------------------------
+
+# Hystérésis sur la vitesse fond (nœuds) : en route au-dessus de
+# UNDERWAY_SOG_KN, à l'arrêt (port, mouillage, maintien en position)
+# en dessous de STOPPED_SOG_KN. Entre les deux, l'état précédent est
+# conservé, sauf si le cap est stable (route lente, remorquage…)
+UNDERWAY_SOG_KN = 3.0
+STOPPED_SOG_KN = 1.0
+
+# Stabilité du cap : longueur moyenne du vecteur cap sur COG_WINDOW points
+# (1 = cap constant, ~0 = cap aléatoire d'un navire immobile)
+COG_WINDOW = 5
+COG_STEADY = 0.9
+
+# Un état plus court que MIN_SEGMENT est absorbé par le précédent ;
+# un trou de données plus long que MAX_GAP coupe le segment
+MIN_SEGMENT = pd.Timedelta(minutes=30)
+MAX_GAP = pd.Timedelta(hours=6)
+
+STATES = {0: "stationary", 1: "underway"}
+STATE_LABELS = {"stationary": "escale / maintien en position", "underway": "en route"}
+
+SEGMENT_COLUMNS = ["vessel", "date_start", "date_end", "state", "source", "distance",
+                   "duration_s", "fixes", "mean_sog", "max_sog",
+                   "lat_min", "lat_max", "lon_min", "lon_max"]
+
+
+def create_segments_table(cursor):
+    # Un segment par navire et par début : état, distance (tous les sauts
+    # GPS), durée, vitesse et emprise géographique
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segments (
+            vessel TEXT,
+            date_start TEXT,
+            date_end TEXT,
+            state TEXT,
+            source TEXT,
+            distance REAL,
+            duration_s INTEGER,
+            fixes INTEGER,
+            mean_sog REAL,
+            max_sog REAL,
+            lat_min REAL,
+            lat_max REAL,
+            lon_min REAL,
+            lon_max REAL,
+            PRIMARY KEY (vessel, date_start)
+        ) WITHOUT ROWID
+    ''')
+
+
+def course_steadiness(cog):
+    """Longueur du vecteur cap moyen sur une fenêtre glissante (0..1)."""
+    rad = np.radians(np.asarray(cog, dtype=np.float64))
+    rolling = dict(window=COG_WINDOW, center=True, min_periods=1)
+    c = pd.Series(np.cos(rad)).rolling(**rolling).mean().to_numpy()
+    s = pd.Series(np.sin(rad)).rolling(**rolling).mean().to_numpy()
+    return np.hypot(c, s)
+
+
+def classify(sog, cog, initial=None):
+    """
+    Automate en route / à l'arrêt, vectorisé : seuils francs, puis cap
+    stable dans la zone intermédiaire, puis propagation de l'état
+    précédent (initial : état du segment déjà connu avant ces points).
+    Renvoie un tableau 0 (arrêt) / 1 (en route).
+    """
+    sog = np.asarray(sog, dtype=np.float64)
+    state = np.full(len(sog), np.nan)
+    state[sog >= UNDERWAY_SOG_KN] = 1
+    state[sog <= STOPPED_SOG_KN] = 0
+
+    band = np.isnan(state) & ~np.isnan(sog)
+    state[band & (course_steadiness(cog) >= COG_STEADY)] = 1
+
+    state = pd.Series(state).ffill()
+    return state.fillna(0 if initial is None else initial).to_numpy(dtype=np.int8)
+
+
+def run_starts(state, times):
+    """Début de chaque séquence : changement d'état ou trou de données."""
+    change = np.ones(len(state), dtype=bool)
+    change[1:] = (state[1:] != state[:-1]) | (np.diff(times) > MAX_GAP.value)
+    return change
+
+
+def absorb_short_runs(state, times):
+    """Les séquences plus courtes que MIN_SEGMENT prennent l'état précédent."""
+    starts = np.flatnonzero(run_starts(state, times))
+    if len(starts) <= 1:
+        return state
+    # Durée d'une séquence : jusqu'au premier point de la suivante
+    next_times = np.append(times[starts[1:]], times[-1])
+    short = (next_times - times[starts]) < MIN_SEGMENT.value
+
+    run_state = pd.Series(np.where(short, np.nan, state[starts])).ffill().bfill()
+    run_state = run_state.fillna(state[0]).to_numpy(dtype=np.int8)
+    run = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(state))))
+    return run_state[run]
+
+
+def segment_track(seg, initial=None, lat_col="latitude", lon_col="longitude"):
+    """
+    Segments d'une trace triée par date (un navire, une source) :
+    DataFrame aux colonnes SEGMENT_COLUMNS, dates en texte.
+    """
+    times = seg["date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    sog = seg["sog"].to_numpy(dtype=np.float64)
+    state = absorb_short_runs(classify(sog, seg["cog"], initial), times)
+    starts = np.flatnonzero(run_starts(state, times))
+    ends = np.append(starts[1:], len(state)) - 1
+
+    lat = seg[lat_col].to_numpy(dtype=np.float64)
+    lon = seg[lon_col].to_numpy(dtype=np.float64)
+    dates = seg["date"].reset_index(drop=True)
+    fixes = ends - starts + 1
+    sog0 = np.nan_to_num(sog)
+
+    return pd.DataFrame({
+        "vessel": seg["vessel"].iloc[0],
+        "date_start": dates.iloc[starts].astype(str).to_numpy(),
+        "date_end": dates.iloc[ends].astype(str).to_numpy(),
+        "state": [STATES[s] for s in state[starts]],
+        "source": seg["source"].iloc[0] if "source" in seg else None,
+        "distance": np.add.reduceat(seg["distance"].fillna(0).to_numpy(dtype=np.float64), starts),
+        "duration_s": (times[ends] - times[starts]) // 10**9,
+        "fixes": fixes,
+        "mean_sog": np.add.reduceat(sog0, starts) / fixes,
+        "max_sog": np.maximum.reduceat(sog0, starts),
+        "lat_min": np.minimum.reduceat(lat, starts),
+        "lat_max": np.maximum.reduceat(lat, starts),
+        "lon_min": np.minimum.reduceat(lon, starts),
+        "lon_max": np.maximum.reduceat(lon, starts),
+    }, columns=SEGMENT_COLUMNS)
+
+
+def update_segments(conn, df, replaced=(), segment_col="source",
+                    lat_col="latitude", lon_col="longitude"):
+    """
+    Met à jour la table segments après une ingestion.
+
+    - df       : points pleine résolution triés (vessel, date, distance, sog,
+                 cog, lat, lon), une colonne segment = un fichier source
+    - replaced : plages (vessel, date_min, date_max) supprimées
+
+    Des lignes ajoutées à un fichier déjà ingéré prolongent son dernier
+    segment quand l'état est le même (cf. watch_ingest.py).
+    Renvoie le nombre de segments écrits.
+    """
+    cursor = conn.cursor()
+    create_segments_table(cursor)
+
+    for vessel, date_min, date_max in replaced:
+        cursor.execute('''
+            DELETE FROM segments
+            WHERE vessel = ? AND date_start BETWEEN ? AND ?
+        ''', (vessel, date_min, date_max))
+
+    written = 0
+    for source, seg in df.groupby(segment_col, sort=False):
+        seg = seg.dropna(subset=[lat_col, lon_col])
+        if seg.empty:
+            continue
+        vessel = seg["vessel"].iloc[0]
+
+        last = cursor.execute('''
+            SELECT date_start, date_end, state FROM segments
+            WHERE vessel = ? AND source = ? AND date_start < ?
+            ORDER BY date_start DESC LIMIT 1
+        ''', (vessel, source, str(seg["date"].iloc[0]))).fetchone()
+        initial = {v: k for k, v in STATES.items()}[last[2]] if last else None
+
+        out = segment_track(seg, initial, lat_col, lon_col)
+        out["source"] = source
+
+        first = out.iloc[0]
+        if (last is not None and first["state"] == last[2]
+                and pd.Timestamp(first["date_start"]) - pd.Timestamp(last[1]) <= MAX_GAP):
+            # Suite du dernier segment connu de ce fichier
+            cursor.execute('''
+                UPDATE segments SET
+                    date_end = ?,
+                    distance = distance + ?,
+                    duration_s = ?,
+                    mean_sog = (mean_sog * fixes + ? * ?) / (fixes + ?),
+                    fixes = fixes + ?,
+                    max_sog = max(max_sog, ?),
+                    lat_min = min(lat_min, ?), lat_max = max(lat_max, ?),
+                    lon_min = min(lon_min, ?), lon_max = max(lon_max, ?)
+                WHERE vessel = ? AND date_start = ?
+            ''', (first["date_end"], float(first["distance"]),
+                  int((pd.Timestamp(first["date_end"]) - pd.Timestamp(last[0])).total_seconds()),
+                  float(first["mean_sog"]), int(first["fixes"]), int(first["fixes"]), int(first["fixes"]),
+                  float(first["max_sog"]), float(first["lat_min"]), float(first["lat_max"]),
+                  float(first["lon_min"]), float(first["lon_max"]), vessel, last[0]))
+            out = out.iloc[1:]
+
+        cursor.executemany(f'''
+            REPLACE INTO segments ({', '.join(SEGMENT_COLUMNS)})
+            VALUES ({', '.join('?' * len(SEGMENT_COLUMNS))})
+        ''', out.astype(object).values.tolist())
+        written += len(out)
+    return written
+
+
+def merge_contiguous(df):
+    """
+    Fusionne les segments consécutifs de même état d'un navire, coupés
+    seulement par le découpage en fichiers (trou <= MAX_GAP).
+    """
+    if df.empty:
+        return df
+    df = df.sort_values(["vessel", "date_start"], kind="stable").reset_index(drop=True)
+    start = pd.to_datetime(df["date_start"])
+    end = pd.to_datetime(df["date_end"])
+
+    same = (df["vessel"] == df["vessel"].shift()) & (df["state"] == df["state"].shift())
+    new = ~(same & ((start - end.shift()) <= MAX_GAP))
+    group = new.cumsum()
+
+    df["sog_sum"] = df["mean_sog"] * df["fixes"]
+    out = df.groupby(group).agg(
+        vessel=("vessel", "first"),
+        date_start=("date_start", "first"),
+        date_end=("date_end", "last"),
+        state=("state", "first"),
+        distance=("distance", "sum"),
+        fixes=("fixes", "sum"),
+        sog_sum=("sog_sum", "sum"),
+        max_sog=("max_sog", "max"),
+        lat_min=("lat_min", "min"),
+        lat_max=("lat_max", "max"),
+        lon_min=("lon_min", "min"),
+        lon_max=("lon_max", "max"),
+    ).reset_index(drop=True)
+    out["duration_s"] = (pd.to_datetime(out["date_end"]) - pd.to_datetime(out["date_start"])).dt.total_seconds().astype("int64")
+    out["mean_sog"] = out.pop("sog_sum") / out["fixes"]
+    return out[[c for c in SEGMENT_COLUMNS if c != "source"]]
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------
+# 🗺️ SIMPLIFICATION DES TRACES GPS (Douglas–Peucker)
+# ---------------------------------------------------
+
+# Tolérance (milles nautiques) par niveau de zoom : 0 = vue flotte / océan,
+# 3 = vue rapprochée (approche de port, site de travail)
+ZOOM_TOLERANCES_NM = {
+    0: 2.0,
+    1: 0.5,
+    2: 0.1,
+    3: 0.02,
+}
+
+
+def douglas_peucker(x, y, tolerance):
+    """
+    Masque des points conservés par Douglas–Peucker (version itérative :
+    une pile de segments, distances calculées en NumPy par segment).
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2:
+        keep[:] = True
+        return keep
+
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+
+        xs, ys = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            d = np.hypot(xs, ys)
+        else:
+            d = np.abs(dy * xs - dx * ys) / norm
+
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            m = i + 1 + k
+            keep[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+    return keep
+
+
+def project_nm(lat, lon):
+    """Projection plane locale en milles nautiques (1' de latitude = 1 NM)."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    scale = np.cos(np.radians(np.nanmean(lat))) if len(lat) else 1.0
+    return lon * 60.0 * scale, lat * 60.0
+
+
+def simplify_levels(lat, lon):
+    """
+    Indices conservés pour chaque niveau de zoom. Chaque niveau est calculé
+    à partir du niveau plus fin (les tolérances sont décroissantes), ce qui
+    évite de repasser sur tous les points pour les vues larges.
+    """
+    x, y = project_nm(lat, lon)
+    idx = np.arange(len(x))
+    levels = {}
+    for level in sorted(ZOOM_TOLERANCES_NM, reverse=True):
+        keep = douglas_peucker(x[idx], y[idx], ZOOM_TOLERANCES_NM[level])
+        idx = idx[keep]
+        levels[level] = idx
+    return levels
+
+
+def create_simplified_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS track_simplified (
+            vessel TEXT,
+            level INTEGER,
+            date TEXT,
+            latitude REAL,
+            longitude REAL,
+            PRIMARY KEY (vessel, level, date)
+        ) WITHOUT ROWID
+    ''')
+
+
+def update_simplified(conn, df, replaced=(), segment_col="source",
+                      lat_col="latitude", lon_col="longitude"):
+    """
+    Met à jour les traces simplifiées après une ingestion.
+
+    - df       : points pleine résolution triés, avec une colonne segment
+                 (un fichier source = un segment simplifié indépendamment)
+    - replaced : plages (vessel, date_min, date_max) supprimées
+    """
+    cursor = conn.cursor()
+    create_simplified_table(cursor)
+
+    for vessel, date_min, date_max in replaced:
+        cursor.execute('''
+            DELETE FROM track_simplified
+            WHERE vessel = ? AND date BETWEEN ? AND ?
+        ''', (vessel, date_min, date_max))
+
+    inserted = 0
+    for _, seg in df.groupby(segment_col, sort=False):
+        seg = seg.dropna(subset=[lat_col, lon_col])
+        if seg.empty:
+            continue
+        lat = seg[lat_col].to_numpy()
+        lon = seg[lon_col].to_numpy()
+        dates = seg["date"].astype(str).to_numpy()
+        vessel = seg["vessel"].iloc[0]
+
+        for level, idx in simplify_levels(lat, lon).items():
+            cursor.executemany('''
+                REPLACE INTO track_simplified (vessel, level, date, latitude, longitude)
+                VALUES (?, ?, ?, ?, ?)
+            ''', zip([vessel] * len(idx), [level] * len(idx),
+                     dates[idx], lat[idx].tolist(), lon[idx].tolist()))
+            inserted += len(idx)
+    return inserted
+
+
+def zoom_for_extent(lat, lon):
+    """Zoom mapbox initial qui englobe l'emprise de la trace."""
+    span = max(np.nanmax(lat) - np.nanmin(lat), np.nanmax(lon) - np.nanmin(lon), 1e-3)
+    return float(np.clip(np.log2(360.0 / span) - 1, 1, 14))
+
+
+def decimate(df, max_points):
+    """Dernier recours : un point sur k par navire pour tenir dans le budget."""
+    if len(df) <= max_points:
+        return df
+    step = int(np.ceil(len(df) / max_points))
+    parts = [g.iloc[::step] for _, g in df.groupby("vessel", sort=False)]
+    return pd.concat(parts, ignore_index=True) if parts else df
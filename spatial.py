@@ -0,0 +1,89 @@
+import sqlite3
+
+import numpy as np
+
+from fixes import decoded_sql
+from sqlite_helpers import has_table
+
+# ---------------------------------------------------
+# 🌐 INDEX SPATIAL R*TREE DES POSITIONS
+# ---------------------------------------------------
+
+# Table virtuelle R*Tree : une boîte (dégénérée) par position de fixes.
+# Tenue à jour par des triggers, donc toute insertion / suppression de
+# positions la met à jour dans la même transaction.
+RTREE_TABLE = "distance_rtree"
+
+# id R*Tree = clé de fixes sur un entier : vessel_id * 2^32 + epoch
+# (retrouvée par id >> 32 et id & 0xFFFFFFFF, lecture de la clé primaire)
+ID_SHIFT = 32
+
+
+def rtree_id_sql(alias):
+    return f"({alias}.vessel_id << {ID_SHIFT}) + {alias}.epoch"
+
+
+def _decoded(alias):
+    # Boîtes en degrés (coordonnées entières dans fixes)
+    return decoded_sql("latitude", alias), decoded_sql("longitude", alias)
+
+# 1 minute de latitude = 1 mille nautique
+NM_PER_DEGREE = 60.0
+
+
+def create_spatial_index(cursor):
+    """
+    Crée la R*Tree et ses triggers, puis indexe les positions qui n'y
+    sont pas encore (base existante). Renvoie False si SQLite a été
+    compilé sans le module rtree : les requêtes de zone balaient alors
+    la table.
+    """
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE}
+            USING rtree(id, lat_min, lat_max, lon_min, lon_max)
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Index spatial R*Tree indisponible : {e}")
+        return False
+
+    new_lat, new_lon = _decoded("NEW")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_insert
+        AFTER INSERT ON fixes
+        WHEN NEW.lat_e7 IS NOT NULL AND NEW.lon_e7 IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO {RTREE_TABLE}
+            VALUES ({rtree_id_sql("NEW")}, {new_lat}, {new_lat}, {new_lon}, {new_lon});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_delete
+        AFTER DELETE ON fixes
+        BEGIN
+            DELETE FROM {RTREE_TABLE} WHERE id = {rtree_id_sql("OLD")};
+        END
+    ''')
+
+    # Index créé sur une base déjà remplie (migration) : tout indexer une
+    # fois, les triggers suivent ensuite
+    lat, lon = _decoded("f")
+    cursor.execute(f'''
+        INSERT INTO {RTREE_TABLE}
+        SELECT {rtree_id_sql("f")}, {lat}, {lat}, {lon}, {lon} FROM fixes f
+        WHERE NOT EXISTS (SELECT 1 FROM {RTREE_TABLE})
+          AND f.lat_e7 IS NOT NULL AND f.lon_e7 IS NOT NULL
+    ''')
+    return True
+
+
+def has_spatial_index(conn):
+    return has_table(conn, RTREE_TABLE)
+
+
+def bbox_around(lat, lon, radius_nm):
+    """Rectangle (lat_min, lat_max, lon_min, lon_max) qui contient le cercle."""
+    dlat = radius_nm / NM_PER_DEGREE
+    scale = max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+    dlon = min(radius_nm / (NM_PER_DEGREE * scale), 180.0)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
@@ -0,0 +1,13 @@
+# ---------------------------------------------------
+# 🗄️ PETITS OUTILS SQLITE (sans dépendance)
+# ---------------------------------------------------
+
+# Importable depuis n'importe quel module (ETL, dashboards, API) sans
+# entraîner pandas ni les modules de calcul
+
+
+def has_table(conn, name, schema="main"):
+    """Vrai si la table existe (connexion ou curseur ; schema : base attachée)."""
+    return conn.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
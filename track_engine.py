@@ -0,0 +1,82 @@
+import numpy as np
+
+# 🌍 Rayon de la Terre en milles nautiques
+EARTH_RADIUS_NM = 3440.065
+
+
+# 🌍 Calcul distance entre 2 coordonnées (Haversine) en milles nautiques
+# Fonctionne sur des scalaires comme sur des tableaux NumPy entiers.
+def haversine_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return EARTH_RADIUS_NM * c
+
+
+def hop_distances(lat, lon, vessel=None):
+    """
+    Distances GPS -> GPS (NM) entre chaque point et le point valide précédent.
+
+    - lat / lon : tableaux triés par navire puis par date
+    - vessel    : tableau des navires (optionnel) ; la distance repart à 0
+                  à chaque changement de navire
+    - un point sans coordonnées (NaN) a une distance de 0, et le point
+      valide suivant est mesuré depuis le dernier point valide (pas de trou)
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = len(lat)
+    dist = np.zeros(n, dtype=np.float64)
+    if n < 2:
+        return dist
+
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+
+    # Indice du dernier point valide strictement avant chaque ligne
+    last_valid = np.where(valid, np.arange(n), -1)
+    last_valid = np.maximum.accumulate(last_valid)
+    prev = np.empty(n, dtype=np.int64)
+    prev[0] = -1
+    prev[1:] = last_valid[:-1]
+
+    has_prev = valid & (prev >= 0)
+
+    # Frontières entre navires : pas de distance d'un navire à l'autre
+    # (les données étant triées par navire, un numéro de segment suffit)
+    if vessel is not None:
+        vessel = np.asarray(vessel)
+        seg = np.zeros(n, dtype=np.int64)
+        np.cumsum(vessel[1:] != vessel[:-1], out=seg[1:])
+        has_prev &= seg == seg[np.maximum(prev, 0)]
+
+    idx = np.nonzero(has_prev)[0]
+    src = prev[idx]
+
+    # Haversine avec cos(lat) calculé une seule fois par point
+    lat_r = np.radians(lat)
+    lon_r = np.radians(lon)
+    cos_lat = np.cos(lat_r)
+    a = (np.sin((lat_r[idx] - lat_r[src]) / 2)**2
+         + cos_lat[src] * cos_lat[idx] * np.sin((lon_r[idx] - lon_r[src]) / 2)**2)
+    dist[idx] = 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return dist
+
+
+def compute_track_distances(df, vessel_col="vessel", date_col="date",
+                            lat_col="latitude", lon_col="longitude",
+                            out_col="distance"):
+    """
+    Trie un DataFrame de positions (un ou plusieurs navires) par navire et
+    par date, puis ajoute la colonne des distances GPS -> GPS en un seul
+    appel vectorisé.
+    """
+    sort_cols = [c for c in (vessel_col, date_col) if c in df.columns]
+    df = df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
+
+    vessel = df[vessel_col].to_numpy() if vessel_col in df.columns else None
+    df[out_col] = hop_distances(df[lat_col].to_numpy(), df[lon_col].to_numpy(), vessel)
+    return df
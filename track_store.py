@@ -0,0 +1,188 @@
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+import config
+import fixes
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# Backend des positions GPS : "sqlite" (défaut, bdd2/distance.db)
+# ou "parquet" (bdd2/tracks/vessel=<NAVIRE>/year=<ANNÉE>/part-0.parquet)
+TRACK_BACKEND = os.environ.get("JIFMAR_TRACK_BACKEND", "sqlite").lower()
+
+PARQUET_DIR = Path(os.environ.get("JIFMAR_PARQUET_DIR", config.DATA_DIR / "tracks"))
+
+TRACK_COLUMNS = ["date", "distance", "latitude", "longitude"]
+
+
+# ---------------------------------------------------
+# ✍️ ÉCRITURE (appelée par l'ingestion)
+# ---------------------------------------------------
+
+def partition_dir(vessel, year, root=None):
+    return Path(root or PARQUET_DIR) / f"vessel={vessel}" / f"year={int(year)}"
+
+
+def staging_dir(root=None):
+    # Dossier de travail caché à la racine du store (ignoré par les lecteurs :
+    # pyarrow saute les noms en ".", list_partitions ne voit que vessel=*),
+    # sur le même disque que les partitions : os.replace y est atomique
+    return Path(root or PARQUET_DIR) / ".staging"
+
+
+def write_partition(df, vessel, year, root=None):
+    """
+    Réécrit une partition navire / année (supprimée si df est vide). Le
+    fichier est écrit hors de la partition puis mis en place par os.replace :
+    un lecteur voit l'ancienne version ou la nouvelle, jamais un fichier partiel.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    folder = partition_dir(vessel, year, root)
+    staging = staging_dir(root)
+    staging.mkdir(parents=True, exist_ok=True)
+    tmp = staging / f"{folder.parent.name}.{folder.name}"
+
+    if df.empty:
+        # Retrait d'un bloc (renommage) avant suppression du contenu
+        if folder.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.replace(folder, tmp)
+            shutil.rmtree(tmp, ignore_errors=True)
+        return
+
+    table = pa.Table.from_pandas(
+        df[TRACK_COLUMNS].sort_values("date"), preserve_index=False
+    )
+    pq.write_table(table, tmp)
+    folder.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, folder / "part-0.parquet")
+
+
+def refresh_partitions(db_path, partitions, root=None):
+    """
+    Recopie depuis distance.db les partitions (navire, année) touchées par
+    une ingestion, pour que le store Parquet reste aligné sur SQLite.
+    """
+    conn = sqlite3.connect(db_path)
+    ids = fixes.vessel_ids(conn)
+    for vessel, year in sorted(partitions):
+        df = pd.read_sql_query(
+            f"""
+            SELECT f.epoch AS date, f.distance,
+                   {fixes.decoded_sql("latitude")} AS latitude,
+                   {fixes.decoded_sql("longitude")} AS longitude
+            FROM fixes f
+            WHERE f.vessel_id = ? AND f.epoch >= ? AND f.epoch < ?
+            ORDER BY f.epoch
+            """,
+            conn,
+            params=(ids.get(vessel), fixes.to_epoch(f"{int(year)}-01-01"),
+                    fixes.to_epoch(f"{int(year) + 1}-01-01")),
+        )
+        df["date"] = pd.to_datetime(df["date"], unit="s")
+        write_partition(df, vessel, year, root)
+    conn.close()
+
+
+def db_partitions(db_path):
+    """Partitions (navire, année) présentes dans distance.db."""
+    conn = sqlite3.connect(db_path)
+    partitions = conn.execute(
+        """SELECT DISTINCT v.name, CAST(strftime('%Y', f.epoch, 'unixepoch') AS INTEGER)
+           FROM fixes f JOIN vessels v ON v.vessel_id = f.vessel_id"""
+    ).fetchall()
+    conn.close()
+    return {tuple(p) for p in partitions}
+
+
+def rebuild_store(db_path, root=None):
+    """
+    Reconstruit tout le store Parquet à partir de distance.db, dans un
+    dossier voisin basculé à la fin par renommage : pendant la
+    reconstruction, les lecteurs gardent l'ancien store complet.
+    """
+    partitions = db_partitions(db_path)
+
+    root = Path(root or PARQUET_DIR)
+    new, old = root.with_name(f".{root.name}.new"), root.with_name(f".{root.name}.old")
+    shutil.rmtree(new, ignore_errors=True)
+    shutil.rmtree(old, ignore_errors=True)
+    new.mkdir(parents=True)
+    refresh_partitions(db_path, partitions, new)
+    shutil.rmtree(staging_dir(new), ignore_errors=True)
+
+    # Deux renommages (un dossier non vide ne peut pas en écraser un autre) :
+    # le store n'est absent qu'entre ces deux appels
+    if root.exists():
+        os.replace(root, old)
+    os.replace(new, root)
+    shutil.rmtree(old, ignore_errors=True)
+    return len(partitions)
+
+
+# ---------------------------------------------------
+# 📖 LECTURE (appelée par les dashboards)
+# ---------------------------------------------------
+
+def list_partitions(root=None):
+    """Liste (navire, année) des partitions présentes, sans lire de données."""
+    root = Path(root or PARQUET_DIR)
+    partitions = []
+    for vessel_dir in root.glob("vessel=*"):
+        for year_dir in vessel_dir.glob("year=*"):
+            partitions.append((vessel_dir.name.split("=", 1)[1],
+                               int(year_dir.name.split("=", 1)[1])))
+    return sorted(partitions)
+
+
+def store_version(root=None):
+    """Empreinte du store (taille + date de modification de chaque partition)."""
+    root = Path(root or PARQUET_DIR)
+    return tuple(sorted(
+        (path.parent.as_posix(), path.stat().st_size, path.stat().st_mtime_ns)
+        for path in root.glob("vessel=*/year=*/*.parquet")
+    ))
+
+
+def read_tracks(vessels=None, year_start=None, year_end=None, columns=None, root=None):
+    """
+    Lit uniquement les partitions et colonnes nécessaires (filtres poussés
+    jusqu'au niveau des fichiers). Renvoie les colonnes demandées + vessel.
+    """
+    import pyarrow.dataset as ds
+
+    columns = list(columns or TRACK_COLUMNS)
+    root = Path(root or PARQUET_DIR)
+    empty = pd.DataFrame(columns=columns + ["vessel"])
+    if not root.exists():
+        return empty
+
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+
+    expr = None
+    conditions = []
+    if vessels is not None:
+        conditions.append(ds.field("vessel").isin(list(vessels)))
+    if year_start is not None:
+        conditions.append(ds.field("year") >= int(year_start))
+    if year_end is not None:
+        conditions.append(ds.field("year") <= int(year_end))
+    for cond in conditions:
+        expr = cond if expr is None else expr & cond
+
+    table = dataset.to_table(columns=columns + ["vessel"], filter=expr)
+    if table.num_rows == 0:
+        return empty
+
+    df = table.to_pandas()
+    df["vessel"] = df["vessel"].astype(str)
+    sort_cols = [c for c in ("vessel", "date") if c in df.columns]
+    return df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
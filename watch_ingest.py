@@ -0,0 +1,170 @@
+import os
+import argparse
+import threading
+import time
+
+import bulk_load
+import export_Distance_sqlite as export
+from queries import ensure_indexes
+
+# ---------------------------------------------------
+# 📌 CONFIGURATION
+# ---------------------------------------------------
+
+# Intervalle de scrutation des dossiers Distance/Distance_*/<NAVIRE>/ (secondes)
+POLL_INTERVAL = float(os.environ.get("JIFMAR_WATCH_INTERVAL", 10))
+
+# Un fichier n'est ingéré que si sa taille et sa date de modification n'ont
+# pas bougé depuis ce délai (évite de lire un dépôt satcom en cours d'écriture)
+SETTLE_SECONDS = float(os.environ.get("JIFMAR_WATCH_SETTLE", 5))
+
+
+# ---------------------------------------------------
+# 👀 DÉTECTION DES CHANGEMENTS
+# ---------------------------------------------------
+
+def start_observer(wake):
+    """
+    Notifications du système de fichiers (inotify…) via watchdog s'il est
+    installé : chaque événement réveille la boucle sans attendre l'intervalle.
+    Sans watchdog, la scrutation périodique suffit.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if not event.is_directory:
+                wake.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(export.base_path), recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+class Watcher:
+    """Ingestion en continu : un lot = les fichiers stables, en une transaction."""
+
+    def __init__(self, settle=SETTLE_SECONDS, workers=1):
+        self.settle = settle
+        self.workers = workers
+        # Fichiers en attente : chemin -> ((taille, mtime), vu stable depuis)
+        self.pending = {}
+        # Fichiers lus sans résultat (erreur, ligne incomplète) : ignorés
+        # tant que leur taille / date de modification ne change pas
+        self.skipped = {}
+
+        export.output_dir.mkdir(exist_ok=True)
+        self.conn = bulk_load.connect_for_load(export.db_path)
+        export.create_tables(self.conn.cursor())
+        ensure_indexes(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def ready_candidates(self, manifest):
+        """Fichiers nouveaux / modifiés dont l'écriture semble terminée."""
+        now = time.monotonic()
+        ready, seen = [], set()
+
+        for candidate in export.find_candidate_files(manifest):
+            path = candidate["path"]
+            signature = (candidate["size"], candidate["mtime"])
+            seen.add(path)
+            if self.skipped.get(path) == signature:
+                continue
+
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != signature:
+                self.pending[path] = (signature, now)
+            if now - self.pending[path][1] >= self.settle:
+                ready.append(candidate)
+
+        # Fichiers supprimés ou déjà ingérés entre-temps
+        for path in set(self.pending) - seen:
+            del self.pending[path]
+        return ready
+
+    def poll(self):
+        """Un passage : renvoie le nombre de fichiers ingérés."""
+        cursor = self.conn.cursor()
+        manifest = export.load_manifest(cursor)
+        ready = self.ready_candidates(manifest)
+        if not ready:
+            return 0
+
+        frames = export.read_candidates(cursor, ready, self.workers)
+        if frames:
+            partitions = export.ingest_frames(self.conn, manifest, frames)
+        else:
+            self.conn.commit()
+
+        ingested = {item["path"] for item in frames}
+        for candidate in ready:
+            self.pending.pop(candidate["path"], None)
+            if candidate["path"] not in ingested:
+                self.skipped[candidate["path"]] = (candidate["size"], candidate["mtime"])
+
+        if frames:
+            export.export_parquet(partitions)
+            export.export_efficiency(partitions)
+        return len(frames)
+
+    def pending_delay(self):
+        """Attente avant le prochain passage utile pour un fichier en attente."""
+        if not self.pending:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(since + self.settle - now for _, since in self.pending.values()))
+
+
+def watch(interval=POLL_INTERVAL, settle=SETTLE_SECONDS, workers=1):
+    wake = threading.Event()
+    observer = start_observer(wake)
+    watcher = Watcher(settle, workers)
+
+    mode = "notifications + scrutation" if observer else "scrutation"
+    print(f"👀 Surveillance de {export.base_path} ({mode} toutes les {interval:g} s)")
+
+    try:
+        while True:
+            count = watcher.poll()
+            if count:
+                print(f"🎉 {count} fichier(s) ingéré(s) → {export.db_path}")
+
+            delay = watcher.pending_delay()
+            wake.wait(interval if delay is None else min(interval, delay + 0.1))
+            wake.clear()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt de la surveillance")
+    finally:
+        if observer is not None:
+            observer.stop()
+        watcher.close()
+
+
+# 🚀 Lancement
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion en continu des dépôts satcom vers distance.db")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                        help="intervalle de scrutation en secondes")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="délai de stabilité d'un fichier avant ingestion")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="nombre de processus de lecture")
+    parser.add_argument("--once", action="store_true",
+                        help="un seul passage (fichiers déjà stables), puis arrêt")
+    args = parser.parse_args()
+
+    if args.once:
+        watcher = Watcher(settle=0, workers=args.workers)
+        count = watcher.poll()
+        watcher.close()
+        print(f"🎉 {count} fichier(s) ingéré(s) → {export.db_path}")
+    else:
+        watch(args.interval, args.settle, args.workers)